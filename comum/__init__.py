@@ -0,0 +1 @@
+"""Módulos compartilhados entre robô, dashboard (webapp) e app de paradas."""
@@ -0,0 +1,156 @@
+"""
+Expiração dos arquivos de cookies em cookies/ (robô e dashboard).
+
+Para cada arquivo (.pkl no formato Selenium ou .json exportado do
+navegador) a data de expiração é calculada uma vez e guardada em cache
+junto com mtime/tamanho; enquanto o arquivo não mudar, só custa um stat().
+
+  - Solarman: campo "exp" do JWT guardado num dos cookies;
+  - Growatt (json_para_pkl_growatt.py): menor "expiry"/"expirationDate"
+    entre os cookies do portal (cookies de analytics são ignorados).
+"""
+import os
+import json
+import base64
+import pickle
+import threading
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COOKIES_DIR = os.path.join(BASE_DIR, "cookies")
+EXTENSOES = (".pkl", ".json")
+
+# cookies de rastreamento vencem em horas/dias e não derrubam o login
+PREFIXOS_IGNORADOS = ("_ga", "_gid", "_gat", "_fbp", "Hm_lvt", "Hm_lpvt")
+
+_cache: dict[str, tuple] = {}
+_lock = threading.Lock()
+
+
+def carregar_cookies(caminho: str) -> list:
+    """Cookies no formato Selenium (.pkl) ou exportados em JSON."""
+    if caminho.endswith(".pkl"):
+        with open(caminho, "rb") as f:
+            return pickle.load(f)
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def expiracao_jwt(cookies: list):
+    """Menor "exp" entre os cookies que são JWT, ou None."""
+    expiracoes = []
+    for cookie in cookies:
+        valor = cookie.get("value") or ""
+        if not valor.startswith("eyJ"):
+            continue
+        try:
+            payload_b64 = valor.split(".")[1]
+            payload_b64 += "=" * (-len(payload_b64) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(payload_b64).decode("utf-8"))
+            expiracoes.append(float(payload["exp"]))
+        except (IndexError, KeyError, TypeError, ValueError):
+            continue
+    return min(expiracoes, default=None)
+
+
+def expiracao_cookies(cookies: list):
+    """Menor expiry dos cookies do portal, ou None (só cookies de sessão)."""
+    expiracoes = []
+    for cookie in cookies:
+        if (cookie.get("name") or "").startswith(PREFIXOS_IGNORADOS):
+            continue
+        expira = cookie.get("expiry", cookie.get("expirationDate"))
+        if expira:
+            try:
+                expiracoes.append(float(expira))
+            except (TypeError, ValueError):
+                continue
+    return min(expiracoes, default=None)
+
+
+def _calcular(caminho: str) -> dict:
+    try:
+        cookies = carregar_cookies(caminho)
+    except Exception as e:
+        # arquivo corrompido/ilegível derruba o login como um vencido
+        return {"expira_ts": None, "fonte": None, "erro": str(e), "ilegivel": True}
+    expira = expiracao_jwt(cookies)
+    if expira is not None:
+        return {"expira_ts": expira, "fonte": "jwt", "erro": None}
+    expira = expiracao_cookies(cookies)
+    if expira is not None:
+        return {"expira_ts": expira, "fonte": "expiry", "erro": None}
+    return {"expira_ts": None, "fonte": None, "erro": "Sem data de expiração nos cookies"}
+
+
+def info_arquivo(caminho: str, dias_aviso: int = 5) -> dict:
+    """
+    {"arquivo", "expira_ts", "expira_em", "dias_restantes", "precisa_renovar",
+     "cor", "fonte", "erro"}. Arquivo ausente ou ilegível conta como expirado.
+    """
+    arquivo = os.path.basename(caminho)
+    try:
+        st = os.stat(caminho)
+    except OSError:
+        return {
+            "arquivo": arquivo,
+            "expira_ts": None,
+            "expira_em": None,
+            "dias_restantes": 0,
+            "precisa_renovar": True,
+            "cor": "danger",
+            "fonte": None,
+            "erro": "Arquivo não encontrado",
+        }
+
+    assinatura = (st.st_mtime_ns, st.st_size)
+    with _lock:
+        em_cache = _cache.get(caminho)
+    if em_cache and em_cache[0] == assinatura:
+        base = em_cache[1]
+    else:
+        base = _calcular(caminho)
+        with _lock:
+            _cache[caminho] = (assinatura, base)
+
+    info = {"arquivo": arquivo, **base}
+    if base.get("ilegivel"):
+        info.update(
+            expira_em=None, dias_restantes=0, precisa_renovar=True, cor="danger"
+        )
+        return info
+    if base["expira_ts"] is None:
+        # sem data conhecida: não dá para avisar antes, só quando falhar
+        info.update(
+            expira_em=None, dias_restantes=None, precisa_renovar=False, cor="secondary"
+        )
+        return info
+
+    expira = datetime.fromtimestamp(base["expira_ts"])
+    dias = (expira - datetime.now()).days
+    info.update(
+        expira_em=expira.strftime("%d/%m/%Y %H:%M"),
+        dias_restantes=dias,
+        precisa_renovar=dias <= dias_aviso,
+        cor="success" if dias > 10 else ("warning" if dias > 5 else "danger"),
+    )
+    return info
+
+
+def info_todos(dias_aviso: int = 5, diretorio: str = None) -> dict:
+    """
+    {arquivo: info} de todos os cookies do diretório. O .json que deu
+    origem a um .pkl de mesmo nome é pulado.
+    """
+    diretorio = diretorio or COOKIES_DIR
+    try:
+        nomes = sorted(n for n in os.listdir(diretorio) if n.endswith(EXTENSOES))
+    except OSError:
+        return {}
+    resultado = {}
+    for nome in nomes:
+        raiz, ext = os.path.splitext(nome)
+        if ext == ".json" and f"{raiz}.pkl" in nomes:
+            continue
+        resultado[nome] = info_arquivo(os.path.join(diretorio, nome), dias_aviso)
+    return resultado
@@ -0,0 +1,135 @@
+"""
+Acesso ao MariaDB com pool de conexões compartilhado.
+
+Usado pelo robô, pela dashboard e pelo app de paradas. get_db_connection()
+devolve uma conexão emprestada do pool: conn.close() apenas a devolve, sem
+novo connect/auth na próxima chamada. O pool não recupera conexões
+esquecidas, então quem não usa cursor()/consultar() precisa fechar a
+conexão num finally.
+
+As conexões ficam em autocommit (leituras não seguram snapshot antigo entre
+empréstimos); quem precisa de transação chama conn.start_transaction().
+"""
+import os
+import time
+import logging
+import threading
+import weakref
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector import errors, pooling
+
+logger = logging.getLogger(__name__)
+
+DB_SOCKET_PADRAO = "/var/run/mysqld/mysqld.sock"
+
+_pool = None
+_pool_pid = None
+_lock_pool = threading.Lock()
+
+# cursores preparados por conexão física: {cnx: (connection_id, {chave: cursor})}
+_preparados = weakref.WeakKeyDictionary()
+
+
+def _criar_pool():
+    return pooling.MySQLConnectionPool(
+        pool_name=f"solar_{os.getpid()}",
+        pool_size=int(os.getenv("DB_POOL_TAMANHO", "5")),
+        pool_reset_session=False,
+        autocommit=True,
+        unix_socket=os.getenv("DB_SOCKET", DB_SOCKET_PADRAO),
+        user=os.getenv("DB_USER", "solar_user"),
+        password=os.getenv("DB_PASS", ""),
+        database=os.getenv("DB_NAME", "solar_monitor"),
+    )
+
+
+def obter_pool():
+    """Cria o pool sob demanda; recria após fork (ex.: workers do gunicorn)."""
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _lock_pool:
+            if _pool is None or _pool_pid != pid:
+                _pool = _criar_pool()
+                _pool_pid = pid
+    return _pool
+
+
+def get_db_connection(timeout: float = 10):
+    """
+    Empresta uma conexão do pool (o pool já faz ping/reconnect na saída).
+    Espera até `timeout` segundos se todas estiverem em uso.
+    """
+    limite = time.monotonic() + timeout
+    while True:
+        try:
+            conn = obter_pool().get_connection()
+        except errors.PoolError:
+            if time.monotonic() >= limite:
+                raise
+            time.sleep(0.05)
+            continue
+        if conn.in_transaction:
+            conn.rollback()
+        return conn
+
+
+@contextmanager
+def cursor(dictionary: bool = False, commit: bool = False):
+    """
+    with cursor(dictionary=True) as cur:
+        cur.execute(...)
+    """
+    conn = get_db_connection()
+    cur = None
+    try:
+        cur = conn.cursor(dictionary=dictionary)
+        yield cur
+        if commit:
+            conn.commit()
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        if cur is not None:
+            cur.close()
+        conn.close()
+
+
+def _cursor_preparado(conn, sql: str, dictionary: bool):
+    cnx = conn._cnx  # conexão física por trás do PooledMySQLConnection
+    conn_id = cnx.connection_id
+    cache = _preparados.get(cnx)
+    if cache is None or cache[0] != conn_id:
+        # conexão nova ou reconectada: statements antigos não valem mais
+        cache = (conn_id, {})
+        _preparados[cnx] = cache
+    chave = (sql, dictionary)
+    cur = cache[1].get(chave)
+    if cur is None:
+        cur = cnx.cursor(prepared=True, dictionary=dictionary)
+        cache[1][chave] = cur
+    return cur
+
+
+def consultar(sql: str, params: tuple = (), dictionary: bool = False) -> list:
+    """SELECT via prepared statement reaproveitado na conexão do pool."""
+    conn = get_db_connection()
+    try:
+        cur = _cursor_preparado(conn, sql, dictionary)
+        cur.execute(sql, params)
+        return cur.fetchall()
+    finally:
+        conn.close()
+
+
+def verificar_saude() -> bool:
+    """Health check simples: empresta uma conexão e roda SELECT 1."""
+    try:
+        return consultar("SELECT 1") == [(1,)]
+    except mysql.connector.Error as e:
+        logger.error(f"[DB] Health check falhou: {e}")
+        return False
@@ -0,0 +1,47 @@
+"""
+Configuração de produção (gunicorn) comum à dashboard e ao app de paradas.
+
+Cada app tem o seu gunicorn.conf.py, que importa daqui e define só bind e
+threads:
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Workers gthread: vários processos, cada um com várias threads, para que
+conexões longas (SSE em /eventos, telas de parede) e usuários não
+enfileirem atrás de uma única requisição. preload_app carrega o app uma
+vez antes do fork (o pool do banco em comum.db é recriado em cada worker).
+"""
+import os
+import multiprocessing
+
+__all__ = [
+    "workers",
+    "worker_class",
+    "preload_app",
+    "max_requests",
+    "max_requests_jitter",
+    "keepalive",
+    "timeout",
+    "graceful_timeout",
+    "accesslog",
+    "errorlog",
+    "loglevel",
+]
+
+workers = int(
+    os.getenv("GUNICORN_WORKERS", min(multiprocessing.cpu_count() * 2 + 1, 4))
+)
+worker_class = "gthread"
+preload_app = True
+
+# recicla workers periodicamente (vazamentos de memória), sem todos de uma vez
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOGLEVEL", "info")
@@ -0,0 +1,34 @@
+"""
+Janela de sol usada pelo robô (agendamento) e pelo app de paradas.
+
+Fora dela as usinas não geram, então paradas não contam e o coletor pode
+espaçar as checagens. Ajustável por JANELA_SOL_INICIO / JANELA_SOL_FIM
+(horas inteiras, horário local).
+"""
+import os
+from datetime import datetime, timedelta
+
+HORA_INICIO_SOL = int(os.getenv("JANELA_SOL_INICIO", "6"))
+HORA_FIM_SOL = int(os.getenv("JANELA_SOL_FIM", "18"))
+
+
+def inicio_sol(dia: datetime) -> datetime:
+    return dia.replace(hour=HORA_INICIO_SOL, minute=0, second=0, microsecond=0)
+
+
+def fim_sol(dia: datetime) -> datetime:
+    return dia.replace(hour=HORA_FIM_SOL, minute=0, second=0, microsecond=0)
+
+
+def em_horario_sol(momento: datetime) -> bool:
+    return inicio_sol(momento) <= momento < fim_sol(momento)
+
+
+def segundos_ate_amanhecer(momento: datetime) -> float:
+    """Segundos até o próximo início da janela (0 se já estiver nela)."""
+    if em_horario_sol(momento):
+        return 0.0
+    proximo = inicio_sol(momento)
+    if proximo <= momento:
+        proximo += timedelta(days=1)
+    return (proximo - momento).total_seconds()
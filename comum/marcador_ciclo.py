@@ -0,0 +1,34 @@
+"""
+Marcador de "ciclo gravado" entre o robô e a dashboard.
+
+O EscritorCiclo toca cache/ultimo_ciclo depois de cada commit; a dashboard
+compara o mtime do arquivo com o do snapshot que tem em memória e só volta
+ao banco quando ele muda (ou quando o TTL vence).
+"""
+import os
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARCADOR_PADRAO = os.path.join(BASE_DIR, "cache", "ultimo_ciclo")
+
+
+def caminho_marcador() -> str:
+    return os.getenv("MARCADOR_CICLO", MARCADOR_PADRAO)
+
+
+def marcar_ciclo():
+    caminho = caminho_marcador()
+    try:
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write(f"{time.time():.3f}\n")
+    except OSError:
+        pass
+
+
+def versao_ciclo() -> int:
+    """mtime (ns) do último ciclo gravado; 0 se o robô ainda não marcou."""
+    try:
+        return os.stat(caminho_marcador()).st_mtime_ns
+    except OSError:
+        return 0
@@ -0,0 +1,48 @@
+"""
+Ajustes de produção comuns à dashboard e ao app de paradas.
+
+- arquivos de static/ (css, js, img) com Cache-Control longo; o url_for
+  acrescenta ?v=<mtime>, então um arquivo alterado muda de URL;
+- compressão gzip/br via flask-compress, se o pacote estiver instalado
+  (o stream SSE de /eventos fica de fora).
+"""
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def configurar_producao(app):
+    app.config["SEND_FILE_MAX_AGE_DEFAULT"] = int(
+        os.getenv("STATIC_MAX_AGE_S", str(30 * 24 * 3600))
+    )
+
+    @app.url_defaults
+    def versao_estatico(endpoint, values):
+        if endpoint != "static" or "filename" not in values or "v" in values:
+            return
+        try:
+            caminho = os.path.join(app.static_folder, values["filename"])
+            values["v"] = int(os.stat(caminho).st_mtime)
+        except OSError:
+            pass
+
+    try:
+        from flask_compress import Compress
+    except ImportError:
+        logger.info("flask-compress não instalado; respostas sem compressão.")
+        return
+
+    app.config.setdefault(
+        "COMPRESS_MIMETYPES",
+        [
+            "text/html",
+            "text/css",
+            "text/javascript",
+            "application/javascript",
+            "application/json",
+            "image/svg+xml",
+        ],
+    )
+    app.config.setdefault("COMPRESS_STREAMS", False)
+    Compress(app)
@@ -1,4 +1,6 @@
 import os
+import sys
+from bisect import bisect_right
 from datetime import datetime
 import json
 from flask import Flask, render_template, request, redirect, url_for, flash
@@ -14,14 +16,19 @@ from werkzeug.security import check_password_hash, generate_password_hash
 
 from flask import Flask, render_template
 from dotenv import load_dotenv
-import mysql.connector
 
 # Carrega o mesmo .env da raiz
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 ENV_PATH = os.path.join(BASE_DIR, ".env")
 load_dotenv(ENV_PATH)
 
+sys.path.insert(0, BASE_DIR)
+from comum.db import cursor  # noqa: E402
+from comum.janela_sol import fim_sol, inicio_sol  # noqa: E402
+from comum.web import configurar_producao  # noqa: E402
+
 app = Flask(__name__)
+configurar_producao(app)
 
 # Por enquanto, uma chave simples (depois colocamos no .env)
 app.secret_key = os.getenv("FLASK_SECRET_KEY", "mude-esta-chave")
@@ -39,30 +46,25 @@ class User(UserMixin):
 
     @staticmethod
     def get_by_username(username):
-        conn = get_db_connection()
-        cur = conn.cursor(dictionary=True)
-        cur.execute(
-            "SELECT id, username, senha_hash, ativo FROM usuarios WHERE username = %s",
-            (username,),
-        )
-        row = cur.fetchone()
-        cur.close()
-        conn.close()
+        with cursor(dictionary=True) as cur:
+            cur.execute(
+                "SELECT id, username, senha_hash, ativo FROM usuarios "
+                "WHERE username = %s",
+                (username,),
+            )
+            row = cur.fetchone()
         if not row:
             return None
         return User(row["id"], row["username"], row["senha_hash"], row["ativo"])
 
     @staticmethod
     def get_by_id(user_id):
-        conn = get_db_connection()
-        cur = conn.cursor(dictionary=True)
-        cur.execute(
-            "SELECT id, username, senha_hash, ativo FROM usuarios WHERE id = %s",
-            (user_id,),
-        )
-        row = cur.fetchone()
-        cur.close()
-        conn.close()
+        with cursor(dictionary=True) as cur:
+            cur.execute(
+                "SELECT id, username, senha_hash, ativo FROM usuarios WHERE id = %s",
+                (user_id,),
+            )
+            row = cur.fetchone()
         if not row:
             return None
         return User(row["id"], row["username"], row["senha_hash"], row["ativo"])
@@ -73,31 +75,17 @@ def load_user(user_id):
     return User.get_by_id(user_id)
 
 
-def get_db_connection():
-    """
-    Usa o MESMO banco do sistema principal.
-    """
-    return mysql.connector.connect(
-        unix_socket="/var/run/mysqld/mysqld.sock",
-        user=os.getenv("DB_USER", "solar_user"),
-        password=os.getenv("DB_PASS", ""),
-        database=os.getenv("DB_NAME", "solar_monitor"),
-    )
-
-
 from datetime import time, timedelta  # já vamos usar depois
 
 
 def recortar_para_horario_sol(inicio, fim):
     """
-    Recorta o intervalo [inicio, fim] para dentro da janela de sol (06:00–18:00).
+    Recorta o intervalo [inicio, fim] para dentro da janela de sol
+    (HORA_INICIO_SOL–HORA_FIM_SOL, por padrão 06:00–18:00).
     Se não houver interseção, retorna None.
     """
-    inicio_sol = inicio.replace(hour=6, minute=0, second=0, microsecond=0)
-    fim_sol = fim.replace(hour=18, minute=0, second=0, microsecond=0)
-
-    inicio_aj = max(inicio, inicio_sol)
-    fim_aj = min(fim, fim_sol)
+    inicio_aj = max(inicio, inicio_sol(inicio))
+    fim_aj = min(fim, fim_sol(fim))
 
     if fim_aj <= inicio_aj:
         return None
@@ -108,62 +96,92 @@ def recortar_para_horario_sol(inicio, fim):
     }
 
 
-def intervalo_ja_registrado(nome_usina, inicio, fim):
+class ParadasRegistradas:
     """
-    Verifica se já existe uma parada registrada que cobre esse intervalo.
-    Critério simples: qualquer parada da mesma usina que tenha
-    interseção significativa com [inicio, fim].
+    Paradas já registradas de um nome_usina, fundidas em intervalos
+    disjuntos e ordenados. A checagem de sobreposição é uma busca binária
+    em memória, sem ir ao banco por intervalo candidato.
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
+
+    def __init__(self, intervalos):
+        uniao = []
+        for inicio, fim in sorted(intervalos):
+            # só funde o que se sobrepõe: intervalos encostados continuam
+            # separados, como no critério NOT (fim <= inicio OR inicio >= fim)
+            if uniao and inicio < uniao[-1][1]:
+                uniao[-1][1] = max(uniao[-1][1], fim)
+            else:
+                uniao.append([inicio, fim])
+        self._inicios = [i for i, _ in uniao]
+        self._fins = [f for _, f in uniao]
+
+    def sobrepoe(self, inicio, fim):
+        """Mesmo critério de antes: qualquer interseção com [inicio, fim]."""
+        # primeiro intervalo que termina depois de `inicio`
+        k = bisect_right(self._fins, inicio)
+        return k < len(self._inicios) and self._inicios[k] < fim
+
+
+def carregar_paradas_registradas(
+    cur, nome_usina, data_inicio, data_fim, por_placa=False
+):
+    """
+    Uma consulta para a janela inteira: {nome_usina: ParadasRegistradas}.
+    Com por_placa, inclui as paradas '<usina> - <placa>'.
+    """
+    filtro_nome = "nome_usina = %s"
+    params = [nome_usina]
+    if por_placa:
+        filtro_nome = "(nome_usina = %s OR nome_usina LIKE %s)"
+        params.append(f"{nome_usina} - %")
 
     cur.execute(
-        """
-        SELECT 1
+        f"""
+        SELECT nome_usina, inicio, fim
         FROM paradas_usinas
-        WHERE nome_usina = %s
-          AND NOT (fim <= %s OR inicio >= %s)
-        LIMIT 1
+        WHERE {filtro_nome}
+          AND fim > %s AND inicio < %s
         """,
-        (nome_usina, inicio, fim),
+        (*params, data_inicio, data_fim),
     )
-    existe = cur.fetchone() is not None
-    cur.close()
-    conn.close()
-    return existe
+    por_nome = {}
+    for row in cur.fetchall():
+        por_nome.setdefault(row["nome_usina"], []).append((row["inicio"], row["fim"]))
+    return {nome: ParadasRegistradas(ints) for nome, ints in por_nome.items()}
 
 
 def obter_intervalos_parada(nome_usina, data_inicio, data_fim):
     """
     Lê o histórico no período e devolve intervalos de parada
     (OFFLINE/ERRO) já recortados para dentro do horário de sol (06:00–18:00),
-    ignorando intervalos que já tenham uma parada registrada.
+    ignorando intervalos que já tenham uma parada registrada (carregadas
+    uma vez para o período, na mesma conexão).
 
     CASO ESPECIAL:
       - Para 'UFV CASA 4', usa o campo mensagem='Placa X' para sugerir paradas
         por placa, com nome_usina = 'UFV CASA 4 - <codigo_placa>'.
     """
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
-
     intervalos = []
+    sem_registro = ParadasRegistradas([])
 
     # Caso especial: UFV CASA 4 por placa
     if nome_usina == "UFV CASA 4":
-        cur.execute(
-            """
-            SELECT nome_usina, status, changed_at, mensagem
-            FROM usinas_status_historico
-            WHERE nome_usina = %s
-              AND changed_at BETWEEN %s AND %s
-              AND mensagem LIKE 'Placa %%'
-            ORDER BY changed_at
-            """,
-            (nome_usina, data_inicio, data_fim),
-        )
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
+        with cursor(dictionary=True) as cur:
+            registradas = carregar_paradas_registradas(
+                cur, nome_usina, data_inicio, data_fim, por_placa=True
+            )
+            cur.execute(
+                """
+                SELECT nome_usina, status, changed_at, mensagem
+                FROM usinas_status_historico
+                WHERE nome_usina = %s
+                  AND changed_at BETWEEN %s AND %s
+                  AND mensagem LIKE 'Placa %%'
+                ORDER BY changed_at
+                """,
+                (nome_usina, data_inicio, data_fim),
+            )
+            rows = cur.fetchall()
 
         # agrupa por código de placa extraído de mensagem ("Placa 4139...")
         por_placa = {}
@@ -192,8 +210,8 @@ def obter_intervalos_parada(nome_usina, data_inicio, data_fim):
                 intervalo_aj = recortar_para_horario_sol(inicio, fim)
                 if intervalo_aj is None:
                     return
-                if intervalo_ja_registrado(
-                    nome_parada, intervalo_aj["inicio"], intervalo_aj["fim"]
+                if registradas.get(nome_parada, sem_registro).sobrepoe(
+                    intervalo_aj["inicio"], intervalo_aj["fim"]
                 ):
                     return
                 intervalos.append(
@@ -224,19 +242,22 @@ def obter_intervalos_parada(nome_usina, data_inicio, data_fim):
         return intervalos
 
     # Caso padrão (todas as outras usinas) - mesma lógica que você já tinha
-    cur.execute(
-        """
-        SELECT nome_usina, status, changed_at
-        FROM usinas_status_historico
-        WHERE nome_usina = %s
-          AND changed_at BETWEEN %s AND %s
-        ORDER BY changed_at
-        """,
-        (nome_usina, data_inicio, data_fim),
-    )
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+    with cursor(dictionary=True) as cur:
+        registradas = carregar_paradas_registradas(
+            cur, nome_usina, data_inicio, data_fim
+        )
+        ja_registradas = registradas.get(nome_usina, sem_registro)
+        cur.execute(
+            """
+            SELECT nome_usina, status, changed_at
+            FROM usinas_status_historico
+            WHERE nome_usina = %s
+              AND changed_at BETWEEN %s AND %s
+            ORDER BY changed_at
+            """,
+            (nome_usina, data_inicio, data_fim),
+        )
+        rows = cur.fetchall()
 
     em_parada = False
     inicio_parada = None
@@ -246,9 +267,7 @@ def obter_intervalos_parada(nome_usina, data_inicio, data_fim):
         if intervalo_aj is None:
             return
         # Se já existe parada registrada nesse intervalo, não sugerir de novo
-        if intervalo_ja_registrado(
-            nome_usina, intervalo_aj["inicio"], intervalo_aj["fim"]
-        ):
+        if ja_registradas.sobrepoe(intervalo_aj["inicio"], intervalo_aj["fim"]):
             return
         intervalos.append(
             {
@@ -321,67 +340,65 @@ def relatorio_mensal():
     else:
         data_fim = datetime(ano, mes + 1, 1) - timedelta(seconds=1)
 
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
-
-    # lista de usinas para filtro
-    cur.execute("SELECT DISTINCT nome_usina FROM paradas_usinas ORDER BY nome_usina")
-    usinas = [row["nome_usina"] for row in cur.fetchall()]
-
-    # motivos para o select do modal
-    cur.execute(
-        "SELECT id, descricao FROM motivos_parada WHERE ativo = 1 ORDER BY descricao"
-    )
-    motivos = cur.fetchall()
+    with cursor(dictionary=True) as cur:
+        # lista de usinas para filtro
+        cur.execute(
+            "SELECT DISTINCT nome_usina FROM paradas_usinas ORDER BY nome_usina"
+        )
+        usinas = [row["nome_usina"] for row in cur.fetchall()]
 
-    params = [data_inicio, data_fim]
-    where_usina = ""
-    if usina_sel:
-        where_usina = "AND p.nome_usina = %s"
-        params.append(usina_sel)
+        # motivos para o select do modal
+        cur.execute(
+            "SELECT id, descricao FROM motivos_parada "
+            "WHERE ativo = 1 ORDER BY descricao"
+        )
+        motivos = cur.fetchall()
 
-    # RESUMO por usina/motivo
-    cur.execute(
-        f"""
-        SELECT
-          p.nome_usina,
-          m.descricao AS motivo,
-          SUM(TIMESTAMPDIFF(MINUTE, p.inicio, p.fim)) AS minutos_total,
-          COUNT(*) AS qtde_paradas
-        FROM paradas_usinas p
-        JOIN motivos_parada m ON m.id = p.motivo_id
-        WHERE p.inicio BETWEEN %s AND %s
-          {where_usina}
-        GROUP BY p.nome_usina, m.descricao
-        ORDER BY p.nome_usina, minutos_total DESC
-        """,
-        params,
-    )
-    linhas = cur.fetchall()
+        params = [data_inicio, data_fim]
+        where_usina = ""
+        if usina_sel:
+            where_usina = "AND p.nome_usina = %s"
+            params.append(usina_sel)
 
-    # DETALHES por parada (para edição)
-    cur.execute(
-        f"""
-        SELECT
-          p.id,
-          p.nome_usina,
-          p.inicio,
-          p.fim,
-          m.descricao AS motivo,
-          p.motivo_id,
-          p.observacao
-        FROM paradas_usinas p
-        JOIN motivos_parada m ON m.id = p.motivo_id
-        WHERE p.inicio BETWEEN %s AND %s
-          {where_usina}
-        ORDER BY p.nome_usina, p.inicio
-        """,
-        params,
-    )
-    paradas_detalhe = cur.fetchall()
+        # RESUMO por usina/motivo
+        cur.execute(
+            f"""
+            SELECT
+              p.nome_usina,
+              m.descricao AS motivo,
+              SUM(TIMESTAMPDIFF(MINUTE, p.inicio, p.fim)) AS minutos_total,
+              COUNT(*) AS qtde_paradas
+            FROM paradas_usinas p
+            JOIN motivos_parada m ON m.id = p.motivo_id
+            WHERE p.inicio BETWEEN %s AND %s
+              {where_usina}
+            GROUP BY p.nome_usina, m.descricao
+            ORDER BY p.nome_usina, minutos_total DESC
+            """,
+            params,
+        )
+        linhas = cur.fetchall()
 
-    cur.close()
-    conn.close()
+        # DETALHES por parada (para edição)
+        cur.execute(
+            f"""
+            SELECT
+              p.id,
+              p.nome_usina,
+              p.inicio,
+              p.fim,
+              m.descricao AS motivo,
+              p.motivo_id,
+              p.observacao
+            FROM paradas_usinas p
+            JOIN motivos_parada m ON m.id = p.motivo_id
+            WHERE p.inicio BETWEEN %s AND %s
+              {where_usina}
+            ORDER BY p.nome_usina, p.inicio
+            """,
+            params,
+        )
+        paradas_detalhe = cur.fetchall()
 
     return render_template(
         "relatorio_mensal.html",
@@ -409,20 +426,22 @@ def editar_parada():
         flash("Dados incompletos para editar a parada.", "danger")
         return redirect(url_for("relatorio_mensal"))
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        UPDATE paradas_usinas
-        SET motivo_id = %s,
-            observacao = %s
-        WHERE id = %s
-        """,
-        (int(motivo_id), observacao or None, int(parada_id)),
-    )
-    conn.commit()
-    cur.close()
-    conn.close()
+    try:
+        motivo_id, parada_id = int(motivo_id), int(parada_id)
+    except ValueError:
+        flash("Dados inválidos para editar a parada.", "danger")
+        return redirect(url_for("relatorio_mensal"))
+
+    with cursor(commit=True) as cur:
+        cur.execute(
+            """
+            UPDATE paradas_usinas
+            SET motivo_id = %s,
+                observacao = %s
+            WHERE id = %s
+            """,
+            (motivo_id, observacao or None, parada_id),
+        )
 
     flash("Parada atualizada com sucesso.", "success")
     return redirect(
@@ -465,39 +484,37 @@ def relatorio_reincidencia():
         mes_ini = mes - 3
     inicio_mes = datetime(ano_ini, mes_ini, 1)
 
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
-
-    # usinas com paradas para filtro
-    cur.execute("SELECT DISTINCT nome_usina FROM paradas_usinas ORDER BY nome_usina")
-    usinas = [row["nome_usina"] for row in cur.fetchall()]
+    with cursor(dictionary=True) as cur:
+        # usinas com paradas para filtro
+        cur.execute(
+            "SELECT DISTINCT nome_usina FROM paradas_usinas ORDER BY nome_usina"
+        )
+        usinas = [row["nome_usina"] for row in cur.fetchall()]
 
-    params = [inicio_mes, fim_mes]
-    where_usina = ""
-    if usina_sel:
-        where_usina = "AND p.nome_usina = %s"
-        params.append(usina_sel)
+        params = [inicio_mes, fim_mes]
+        where_usina = ""
+        if usina_sel:
+            where_usina = "AND p.nome_usina = %s"
+            params.append(usina_sel)
 
-    # agrupa por motivo (e usina) contando quantas paradas em 3 meses
-    cur.execute(
-        f"""
-        SELECT
-            p.nome_usina,
-            m.descricao AS motivo,
-            COUNT(*) AS qtde_paradas,
-            SUM(TIMESTAMPDIFF(MINUTE, p.inicio, p.fim)) AS minutos_total
-        FROM paradas_usinas p
-        JOIN motivos_parada m ON m.id = p.motivo_id
-        WHERE p.inicio BETWEEN %s AND %s
-          {where_usina}
-        GROUP BY p.nome_usina, m.descricao
-        ORDER BY qtde_paradas DESC, minutos_total DESC
-        """,
-        params,
-    )
-    linhas = cur.fetchall()
-    cur.close()
-    conn.close()
+        # agrupa por motivo (e usina) contando quantas paradas em 3 meses
+        cur.execute(
+            f"""
+            SELECT
+                p.nome_usina,
+                m.descricao AS motivo,
+                COUNT(*) AS qtde_paradas,
+                SUM(TIMESTAMPDIFF(MINUTE, p.inicio, p.fim)) AS minutos_total
+            FROM paradas_usinas p
+            JOIN motivos_parada m ON m.id = p.motivo_id
+            WHERE p.inicio BETWEEN %s AND %s
+              {where_usina}
+            GROUP BY p.nome_usina, m.descricao
+            ORDER BY qtde_paradas DESC, minutos_total DESC
+            """,
+            params,
+        )
+        linhas = cur.fetchall()
 
     return render_template(
         "relatorio_reincidencia.html",
@@ -526,97 +543,92 @@ from datetime import date
 @app.route("/home")
 @login_required
 def home():
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
+    with cursor(dictionary=True) as cur:
+        # total de paradas hoje
+        cur.execute(
+            """
+            SELECT COUNT(*) AS total
+            FROM paradas_usinas
+            WHERE DATE(inicio) = CURDATE()
+        """
+        )
+        row = cur.fetchone()
+        total_paradas_hoje = row["total"] if row else 0
 
-    # total de paradas hoje
-    cur.execute(
+        # total de paradas e horas de parada no mês atual
+        cur.execute(
+            """
+            SELECT
+              COUNT(*) AS total_paradas,
+              SUM(TIMESTAMPDIFF(MINUTE, inicio, fim)) / 60 AS horas_paradas
+            FROM paradas_usinas
+            WHERE YEAR(inicio) = YEAR(CURDATE())
+              AND MONTH(inicio) = MONTH(CURDATE())
         """
-        SELECT COUNT(*) AS total
-        FROM paradas_usinas
-        WHERE DATE(inicio) = CURDATE()
-    """
-    )
-    row = cur.fetchone()
-    total_paradas_hoje = row["total"] if row else 0
+        )
+        row = cur.fetchone() or {}
+        total_paradas_mes = row.get("total_paradas", 0) or 0
+        horas_paradas_mes = row.get("horas_paradas", 0) or 0
 
-    # total de paradas e horas de parada no mês atual
-    cur.execute(
+        # usina com mais paradas no mês
+        cur.execute(
+            """
+            SELECT nome_usina AS usina, COUNT(*) AS qtd
+            FROM paradas_usinas
+            WHERE YEAR(inicio) = YEAR(CURDATE())
+              AND MONTH(inicio) = MONTH(CURDATE())
+            GROUP BY nome_usina
+            ORDER BY qtd DESC
+            LIMIT 1
         """
-        SELECT
-          COUNT(*) AS total_paradas,
-          SUM(TIMESTAMPDIFF(MINUTE, inicio, fim)) / 60 AS horas_paradas
+        )
+        row = cur.fetchone()
+        usina_top_nome = row["usina"] if row else None
+        usina_top_qtd = row["qtd"] if row else None
+
+        cur.execute(
+            """
+        SELECT DAY(inicio) AS dia, COUNT(*) AS qtde
         FROM paradas_usinas
         WHERE YEAR(inicio) = YEAR(CURDATE())
           AND MONTH(inicio) = MONTH(CURDATE())
+        GROUP BY DAY(inicio)
+        ORDER BY dia
     """
-    )
-    row = cur.fetchone() or {}
-    total_paradas_mes = row.get("total_paradas", 0) or 0
-    horas_paradas_mes = row.get("horas_paradas", 0) or 0
+        )
+        rows = cur.fetchall()
+        dias_labels = [str(r["dia"]) for r in rows]
+        dias_values = [r["qtde"] for r in rows]
 
-    # usina com mais paradas no mês
-    cur.execute(
+        # paradas por motivo (mês atual)
+        cur.execute(
+            """
+            SELECT m.descricao AS motivo, COUNT(*) AS qtde
+            FROM paradas_usinas p
+            JOIN motivos_parada m ON m.id = p.motivo_id
+            WHERE YEAR(p.inicio) = YEAR(CURDATE())
+            AND MONTH(p.inicio) = MONTH(CURDATE())
+            GROUP BY m.descricao
+            ORDER BY qtde DESC
         """
-        SELECT nome_usina AS usina, COUNT(*) AS qtd
+        )
+        rows = cur.fetchall()
+        motivos_labels = [r["motivo"] for r in rows]
+        motivos_values = [r["qtde"] for r in rows]
+
+        cur.execute(
+            """
+        SELECT nome_usina AS usina, COUNT(*) AS qtde
         FROM paradas_usinas
         WHERE YEAR(inicio) = YEAR(CURDATE())
           AND MONTH(inicio) = MONTH(CURDATE())
         GROUP BY nome_usina
-        ORDER BY qtd DESC
-        LIMIT 1
-    """
-    )
-    row = cur.fetchone()
-    usina_top_nome = row["usina"] if row else None
-    usina_top_qtd = row["qtd"] if row else None
-
-    cur.execute(
-        """
-    SELECT DAY(inicio) AS dia, COUNT(*) AS qtde
-    FROM paradas_usinas
-    WHERE YEAR(inicio) = YEAR(CURDATE())
-      AND MONTH(inicio) = MONTH(CURDATE())
-    GROUP BY DAY(inicio)
-    ORDER BY dia
-"""
-    )
-    rows = cur.fetchall()
-    dias_labels = [str(r["dia"]) for r in rows]
-    dias_values = [r["qtde"] for r in rows]
-
-    # paradas por motivo (mês atual)
-    cur.execute(
-        """
-        SELECT m.descricao AS motivo, COUNT(*) AS qtde
-        FROM paradas_usinas p
-        JOIN motivos_parada m ON m.id = p.motivo_id
-        WHERE YEAR(p.inicio) = YEAR(CURDATE())
-        AND MONTH(p.inicio) = MONTH(CURDATE())
-        GROUP BY m.descricao
         ORDER BY qtde DESC
-    """
-    )
-    rows = cur.fetchall()
-    motivos_labels = [r["motivo"] for r in rows]
-    motivos_values = [r["qtde"] for r in rows]
-
-    cur.execute(
         """
-    SELECT nome_usina AS usina, COUNT(*) AS qtde
-    FROM paradas_usinas
-    WHERE YEAR(inicio) = YEAR(CURDATE())
-      AND MONTH(inicio) = MONTH(CURDATE())
-    GROUP BY nome_usina
-    ORDER BY qtde DESC
-    """
-    )
-    rows = cur.fetchall()
-    usinas_labels = [r["usina"] for r in rows]
-    usinas_values = [r["qtde"] for r in rows]
-
-    cur.close()
-    conn.close()
+        )
+        rows = cur.fetchall()
+        usinas_labels = [r["usina"] for r in rows]
+        usinas_values = [r["qtde"] for r in rows]
 
     hoje = date.today()
     meses = [
@@ -673,15 +685,11 @@ def editar_motivo():
         flash("Descrição não pode ser vazia.", "danger")
         return redirect(url_for("motivos"))
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "UPDATE motivos_parada SET descricao = %s WHERE id = %s",
-        (descricao, motivo_id),
-    )
-    conn.commit()
-    cur.close()
-    conn.close()
+    with cursor(commit=True) as cur:
+        cur.execute(
+            "UPDATE motivos_parada SET descricao = %s WHERE id = %s",
+            (descricao, motivo_id),
+        )
 
     flash("Motivo atualizado com sucesso.", "success")
     return redirect(url_for("motivos"))
@@ -690,21 +698,6 @@ def editar_motivo():
 @app.route("/paradas", methods=["GET", "POST"])
 @login_required
 def paradas():
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
-
-    # Usinas distintas (histórico geral)
-    cur.execute(
-        "SELECT DISTINCT nome_usina FROM usinas_status_historico ORDER BY nome_usina"
-    )
-    usinas = [row["nome_usina"] for row in cur.fetchall()]
-
-    # Motivos ativos
-    cur.execute(
-        "SELECT id, descricao FROM motivos_parada WHERE ativo = 1 ORDER BY descricao"
-    )
-    motivos = cur.fetchall()
-
     if request.method == "POST":
         nome_usina = request.form.get("nome_usina")
         inicio_str = request.form.get("inicio")
@@ -715,27 +708,26 @@ def paradas():
         try:
             inicio_dt = datetime.fromisoformat(inicio_str)
             fim_dt = datetime.fromisoformat(fim_str)
+            motivo_id = int(motivo_id)
         except Exception:
-            flash("Erro ao interpretar datas da parada.", "danger")
+            flash("Erro ao interpretar datas ou motivo da parada.", "danger")
         else:
-            cur2 = conn.cursor()
-            cur2.execute(
-                """
-                INSERT INTO paradas_usinas
-                    (nome_usina, motivo_id, inicio, fim, observacao, criado_por)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                """,
-                (
-                    nome_usina,
-                    int(motivo_id),
-                    inicio_dt,
-                    fim_dt,
-                    observacao or None,
-                    int(current_user.id),
-                ),
-            )
-            conn.commit()
-            cur2.close()
+            with cursor(commit=True) as cur:
+                cur.execute(
+                    """
+                    INSERT INTO paradas_usinas
+                        (nome_usina, motivo_id, inicio, fim, observacao, criado_por)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    """,
+                    (
+                        nome_usina,
+                        motivo_id,
+                        inicio_dt,
+                        fim_dt,
+                        observacao or None,
+                        int(current_user.id),
+                    ),
+                )
             flash("Parada registrada com sucesso.", "success")
 
         # redireciona para limpar POST e manter filtros atuais
@@ -747,8 +739,20 @@ def paradas():
             )
         )
 
-    cur.close()
-    conn.close()
+    with cursor(dictionary=True) as cur:
+        # Usinas distintas (histórico geral)
+        cur.execute(
+            "SELECT DISTINCT nome_usina FROM usinas_status_historico "
+            "ORDER BY nome_usina"
+        )
+        usinas = [row["nome_usina"] for row in cur.fetchall()]
+
+        # Motivos ativos
+        cur.execute(
+            "SELECT id, descricao FROM motivos_parada "
+            "WHERE ativo = 1 ORDER BY descricao"
+        )
+        motivos = cur.fetchall()
 
     # Filtros
     usina_sel = request.args.get("usina")  # None ou "" = todas
@@ -803,30 +807,26 @@ def paradas():
 @app.route("/motivos", methods=["GET", "POST"])
 @login_required
 def motivos():
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
-
     # Se for POST, estamos criando um novo motivo
     if request.method == "POST":
         descricao = request.form.get("descricao", "").strip()
         if descricao:
-            cur.execute(
-                "INSERT INTO motivos_parada (descricao, ativo) VALUES (%s, 1)",
-                (descricao,),
-            )
-            conn.commit()
+            with cursor(commit=True) as cur:
+                cur.execute(
+                    "INSERT INTO motivos_parada (descricao, ativo) VALUES (%s, 1)",
+                    (descricao,),
+                )
             flash("Motivo de parada cadastrado com sucesso.", "success")
         else:
             flash("Descrição não pode ser vazia.", "danger")
-        cur.close()
-        conn.close()
         return redirect(url_for("motivos"))
 
     # GET: listar todos os motivos
-    cur.execute("SELECT id, descricao, ativo FROM motivos_parada ORDER BY descricao")
-    motivos = cur.fetchall()
-    cur.close()
-    conn.close()
+    with cursor(dictionary=True) as cur:
+        cur.execute(
+            "SELECT id, descricao, ativo FROM motivos_parada ORDER BY descricao"
+        )
+        motivos = cur.fetchall()
 
     return render_template(
         "motivos.html",
@@ -838,19 +838,16 @@ def motivos():
 @app.route("/motivos/<int:motivo_id>/toggle", methods=["POST"])
 @login_required
 def toggle_motivo(motivo_id):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "UPDATE motivos_parada SET ativo = 1 - ativo WHERE id = %s",
-        (motivo_id,),
-    )
-    conn.commit()
-    cur.close()
-    conn.close()
+    with cursor(commit=True) as cur:
+        cur.execute(
+            "UPDATE motivos_parada SET ativo = 1 - ativo WHERE id = %s",
+            (motivo_id,),
+        )
     flash("Status do motivo atualizado.", "info")
     return redirect(url_for("motivos"))
 
 
 if __name__ == "__main__":
     # Roda em porta 5001 para não conflitar com a dashboard
-    app.run(host="0.0.0.0", port=5001, debug=True)
+    # (produção: gunicorn.conf.py)
+    app.run(host="0.0.0.0", port=5001, debug=os.getenv("FLASK_DEBUG") == "1")
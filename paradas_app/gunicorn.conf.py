@@ -0,0 +1,9 @@
+"""Gunicorn do app de paradas; o restante vem de comum/gunicorn_base.py."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from comum.gunicorn_base import *  # noqa: E402,F401,F403
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5001")
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
@@ -1,4 +1,4 @@
 #!/bin/bash
 cd /home/solar/monitoramento_solar/paradas_app
 source /home/solar/monitoramento_solar/venv/bin/activate
-exec python app_paradas.py
+exec gunicorn -c gunicorn.conf.py app_paradas:app
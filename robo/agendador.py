@@ -0,0 +1,218 @@
+"""
+Agendador interno do modo daemon do coletor.
+
+Substitui o cron: o processo fica vivo, com conexões, drivers e caches
+aquecidos, e cada usina roda no seu próprio intervalo (cfg["intervalo_s"])
+com jitter para espalhar a carga nos portais. Uma usina que ainda está em
+coleta é pulada em vez de ser executada em paralelo consigo mesma.
+
+O intervalo é adaptativo, pela primeira regra que casar:
+  - noite (fora da janela de sol): "noite", sem passar do amanhecer;
+  - logo após mudança de status (usina ou placa): "mudanca";
+  - primeiros minutos depois do amanhecer: "amanhecer";
+  - ONLINE e sem mudança há muito tempo: "estavel";
+  - caso contrário: "normal" (cfg["intervalo_s"] ou COLETA_INTERVALO_S).
+Cada usina pode sobrescrever qualquer um deles em cfg["intervalos"].
+"""
+import os
+import time
+import random
+import signal
+import logging
+import threading
+from datetime import datetime
+
+from comum.janela_sol import HORA_INICIO_SOL, em_horario_sol, segundos_ate_amanhecer
+
+logger = logging.getLogger("robo_solar")
+
+
+def intervalos_padrao() -> dict:
+    return {
+        "normal": int(os.getenv("COLETA_INTERVALO_S", "300")),
+        "noite": int(os.getenv("COLETA_INTERVALO_NOITE_S", "1800")),
+        "mudanca": int(os.getenv("COLETA_INTERVALO_MUDANCA_S", "60")),
+        "amanhecer": int(os.getenv("COLETA_INTERVALO_AMANHECER_S", "120")),
+        "estavel": int(os.getenv("COLETA_INTERVALO_ESTAVEL_S", "900")),
+    }
+
+
+def assinatura(resultado: dict) -> tuple:
+    """Status da usina + status de cada placa, para detectar mudança."""
+    placas = tuple(sorted((p["codigo"], p["status"]) for p in resultado.get("placas") or []))
+    return (resultado.get("status"), placas)
+
+
+class AgendadorColeta:
+    def __init__(self, motor, usinas: list, registrar, tarefas_periodicas: list = None):
+        """
+        motor:  MotorColeta usado para submeter as coletas
+        registrar: função (cfg, resultado) chamada ao fim de cada coleta
+        tarefas_periodicas: [(intervalo_s, funcao), ...] extras (ex.: cookies)
+        """
+        self.motor = motor
+        self.usinas = usinas
+        self.registrar = registrar
+        self.intervalos = intervalos_padrao()
+        self.intervalo_padrao = self.intervalos["normal"]
+        self.jitter = float(os.getenv("COLETA_JITTER_S", "30"))
+        # quanto tempo vale o ritmo rápido após mudança / após o amanhecer,
+        # e a partir de quanto tempo sem mudança a usina é considerada estável
+        self.janela_mudanca_s = int(os.getenv("COLETA_JANELA_MUDANCA_S", "900"))
+        self.janela_amanhecer_s = int(os.getenv("COLETA_JANELA_AMANHECER_MIN", "60")) * 60
+        self.estavel_apos_s = int(os.getenv("COLETA_ESTAVEL_APOS_S", "3600"))
+
+        self._parar = threading.Event()
+        self._lock_registro = threading.Lock()
+        self._em_execucao: dict[str, object] = {}
+        self._lock_execucao = threading.Lock()
+
+        agora = time.monotonic()
+        # última assinatura de resultado por usina, desde quando ela se mantém,
+        # e quando houve a última mudança real (a primeira leitura não conta)
+        self._assinaturas: dict[str, tuple] = {}
+        self._igual_desde: dict[str, float] = {}
+        self._mudou_em: dict[str, float] = {}
+        # primeira rodada espalhada dentro da janela de jitter
+        self._proxima = {
+            cfg["nome"]: agora + random.uniform(0, self.jitter) for cfg in usinas
+        }
+        self._periodicas = [
+            [intervalo, funcao, agora] for intervalo, funcao in (tarefas_periodicas or [])
+        ]
+
+    def _intervalos_usina(self, cfg: dict) -> dict:
+        intervalos = dict(self.intervalos)
+        if "intervalo_s" in cfg:
+            intervalos["normal"] = cfg["intervalo_s"]
+        intervalos.update(cfg.get("intervalos") or {})
+        return intervalos
+
+    def regra(self, cfg: dict, agora: float, momento: datetime = None) -> str:
+        nome = cfg["nome"]
+        momento = momento or datetime.now()
+        if not em_horario_sol(momento):
+            return "noite"
+        mudou_em = self._mudou_em.get(nome)
+        if mudou_em is not None and agora - mudou_em < self.janela_mudanca_s:
+            return "mudanca"
+        desde_amanhecer_s = (momento.hour - HORA_INICIO_SOL) * 3600 + momento.minute * 60
+        if desde_amanhecer_s < self.janela_amanhecer_s:
+            return "amanhecer"
+        status = self._assinaturas.get(nome, (None,))[0]
+        igual_desde = self._igual_desde.get(nome, agora)
+        if status == "ONLINE" and agora - igual_desde >= self.estavel_apos_s:
+            return "estavel"
+        return "normal"
+
+    def intervalo(self, cfg: dict, agora: float = None) -> float:
+        agora = time.monotonic() if agora is None else agora
+        momento = datetime.now()
+        regra = self.regra(cfg, agora, momento)
+        intervalo = self._intervalos_usina(cfg)[regra]
+        if regra == "noite":
+            # não atravessa o amanhecer com o intervalo longo da noite
+            intervalo = min(intervalo, segundos_ate_amanhecer(momento))
+        return intervalo
+
+    def _agendar_proxima(self, cfg: dict, base: float):
+        self._proxima[cfg["nome"]] = (
+            base + self.intervalo(cfg, base) + random.uniform(0, self.jitter)
+        )
+
+    def _observar(self, cfg: dict, resultado: dict):
+        """Marca mudança e, se houve, antecipa a próxima checagem."""
+        nome = cfg["nome"]
+        nova = assinatura(resultado)
+        anterior = self._assinaturas.get(nome)
+        self._assinaturas[nome] = nova
+        agora = time.monotonic()
+        if anterior is None:
+            self._igual_desde[nome] = agora
+            return
+        if nova == anterior:
+            return
+        self._igual_desde[nome] = agora
+        self._mudou_em[nome] = agora
+        with self._lock_execucao:
+            proxima = agora + self.intervalo(cfg, agora)
+            if proxima < self._proxima[nome]:
+                self._proxima[nome] = proxima
+
+    def _ao_concluir(self, cfg: dict, future):
+        nome = cfg["nome"]
+        try:
+            resultado = future.result()
+            self._observar(cfg, resultado)
+            with self._lock_registro:
+                self.registrar(cfg, resultado)
+        except Exception as e:
+            logger.error(f"[{nome}] ERRO ao registrar resultado: {type(e).__name__}: {e}")
+        finally:
+            with self._lock_execucao:
+                self._em_execucao.pop(nome, None)
+
+    def _disparar(self, cfg: dict, agora: float):
+        nome = cfg["nome"]
+        with self._lock_execucao:
+            if nome in self._em_execucao:
+                msg = f"[{nome}] Coleta anterior ainda em andamento, pulando esta rodada."
+                logger.warning(msg)
+                self._agendar_proxima(cfg, agora)
+                return
+            # agenda antes de submeter e sob o mesmo lock de _observar: uma
+            # coleta rápida pode antecipar a próxima e não pode ser sobrescrita
+            self._agendar_proxima(cfg, agora)
+            future = self.motor.submeter(cfg)
+            self._em_execucao[nome] = future
+
+        future.add_done_callback(lambda f, cfg=cfg: self._ao_concluir(cfg, f))
+
+    def _rodar_periodicas(self, agora: float):
+        for tarefa in self._periodicas:
+            intervalo, funcao, proxima = tarefa
+            if agora < proxima:
+                continue
+            tarefa[2] = agora + intervalo
+            try:
+                funcao()
+            except Exception as e:
+                logger.error(f"[DAEMON] Tarefa periódica {funcao.__name__} falhou: {e}")
+
+    def parar(self, *_):
+        if not self._parar.is_set():
+            logger.info("[DAEMON] Sinal de parada recebido, finalizando coletas em andamento...")
+        self._parar.set()
+
+    def executar(self, prazo_encerramento: float = 120):
+        signal.signal(signal.SIGTERM, self.parar)
+        signal.signal(signal.SIGINT, self.parar)
+
+        msg = (
+            f"[DAEMON] Iniciado com {len(self.usinas)} usinas "
+            f"(intervalos {self.intervalos}, jitter {self.jitter:.0f}s)"
+        )
+        logger.info(msg)
+
+        while not self._parar.is_set():
+            agora = time.monotonic()
+            self._rodar_periodicas(agora)
+            for cfg in self.usinas:
+                if agora >= self._proxima[cfg["nome"]]:
+                    self._disparar(cfg, agora)
+
+            proxima = min(self._proxima.values(), default=agora + 1)
+            self._parar.wait(min(max(proxima - time.monotonic(), 0.1), 5))
+
+        # encerramento gracioso: espera as coletas em voo até o prazo
+        limite = time.monotonic() + prazo_encerramento
+        while time.monotonic() < limite:
+            with self._lock_execucao:
+                pendentes = len(self._em_execucao)
+            if not pendentes:
+                break
+            time.sleep(0.5)
+        else:
+            logger.warning("[DAEMON] Prazo de encerramento esgotado com coletas em andamento.")
+
+        logger.info("[DAEMON] Encerrado.")
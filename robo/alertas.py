@@ -0,0 +1,233 @@
+"""
+Despacho assíncrono dos alertas WhatsApp (Evolution API, sendText).
+
+A coleta só enfileira; uma thread de fundo envia com uma requests.Session
+persistente. A fila fica em cache/alertas_saida.json (caixa de saída), de
+modo que um alerta que falhou é reenviado com backoff, inclusive na
+próxima execução do cron. Alertas com a mesma chave dentro de
+ALERTAS_DEDUP_S são descartados, e os que chegam juntos (dentro de
+ALERTAS_AGRUPAR_S) para o mesmo número viram uma única mensagem-resumo.
+"""
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from datetime import datetime
+
+import requests
+
+logger = logging.getLogger("robo_solar")
+
+CAIXA_PADRAO = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "cache", "alertas_saida.json"
+)
+
+
+class DespachanteAlertas:
+    def __init__(self, caminho_caixa: str = None):
+        self.base_url = os.getenv("EVOLUTION_BASE_URL", "http://10.254.2.210:5080")
+        self.instance = os.getenv("EVOLUTION_INSTANCE", "Solar")
+        self.numero_padrao = os.getenv("WHATSAPP_NUMBER_ALERTA", "5585981699862")
+        self.caminho_caixa = caminho_caixa or os.getenv("ALERTAS_CAIXA", CAIXA_PADRAO)
+
+        self.janela_dedup_s = int(os.getenv("ALERTAS_DEDUP_S", "1800"))
+        self.janela_agrupamento_s = float(os.getenv("ALERTAS_AGRUPAR_S", "10"))
+        self.max_tentativas = int(os.getenv("ALERTAS_TENTATIVAS", "8"))
+        self.backoff_s = float(os.getenv("ALERTAS_BACKOFF_S", "30"))
+
+        self.sessao = requests.Session()
+        self.sessao.headers.update(
+            {
+                "apikey": os.getenv("EVOLUTION_API_KEY", "F0R$@tl1"),
+                "Content-Type": "application/json",
+            }
+        )
+
+        self._pendentes: list[dict] = []
+        # chave -> epoch até quando alertas com a mesma chave são descartados
+        self._vistos: dict[str, float] = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._parar = False
+
+    # ---------- caixa de saída ----------
+
+    def _carregar(self):
+        try:
+            with open(self.caminho_caixa, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._pendentes = dados.get("pendentes", [])
+        self._vistos = dados.get("vistos", {})
+        if self._pendentes:
+            msg = f"[WHATSAPP] {len(self._pendentes)} alertas pendentes da execução anterior."
+            logger.info(msg)
+
+    def _persistir(self):
+        """Chamado com self._cond adquirido."""
+        agora = time.time()
+        self._vistos = {k: t for k, t in self._vistos.items() if t > agora}
+        try:
+            os.makedirs(os.path.dirname(self.caminho_caixa), exist_ok=True)
+            tmp = f"{self.caminho_caixa}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"pendentes": self._pendentes, "vistos": self._vistos}, f)
+            os.replace(tmp, self.caminho_caixa)
+        except OSError as e:
+            logger.warning(f"[WHATSAPP] Não foi possível gravar a caixa de saída: {e}")
+
+    # ---------- API pública ----------
+
+    def iniciar(self):
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._carregar()
+            self._parar = False
+            self._thread = threading.Thread(
+                target=self._laco, name="alertas-whatsapp", daemon=True
+            )
+            self._thread.start()
+
+    def enfileirar(
+        self,
+        chave: str,
+        texto: str,
+        resumo: str = None,
+        numero: str = None,
+        janela_s: float = None,
+    ):
+        """
+        chave: identifica o evento para dedup (ex.: "UFV-ATLANTA:OFFLINE")
+        resumo: linha usada quando o alerta entra numa mensagem agrupada
+        janela_s: janela de dedup desta chave (padrão ALERTAS_DEDUP_S)
+        """
+        self.iniciar()
+        agora = time.time()
+        with self._cond:
+            if self._vistos.get(chave, 0) > agora:
+                logger.info(f"[WHATSAPP] Alerta repetido ignorado ({chave}).")
+                return
+            janela_s = self.janela_dedup_s if janela_s is None else janela_s
+            self._vistos[chave] = agora + janela_s
+            self._pendentes.append(
+                {
+                    "id": uuid.uuid4().hex,
+                    "chave": chave,
+                    "texto": texto,
+                    "resumo": resumo or texto,
+                    "numero": numero or self.numero_padrao,
+                    "criado_em": agora,
+                    "tentativas": 0,
+                    "proxima_em": agora,
+                }
+            )
+            self._persistir()
+            self._cond.notify()
+
+    def encerrar(self, prazo_s: float = 20):
+        """Envia o que estiver pendente (sem esperar agrupamento) e para."""
+        with self._cond:
+            if self._thread is None:
+                return
+            self._parar = True
+            self._cond.notify()
+        self._thread.join(prazo_s)
+        with self._cond:
+            if self._pendentes:
+                msg = f"[WHATSAPP] {len(self._pendentes)} alertas ficam na caixa de saída."
+                logger.warning(msg)
+            self._thread = None
+
+    # ---------- envio ----------
+
+    def _montar(self, itens: list) -> str:
+        if len(itens) == 1:
+            return itens[0]["texto"]
+        linhas = "\n".join(f"- {item['resumo']}" for item in itens)
+        return (
+            f"ALERTA MONITORAMENTO SOLAR ({len(itens)} eventos)\n\n"
+            f"{linhas}\n\n"
+            f"Data/hora: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
+        )
+
+    def _enviar(self, numero: str, texto: str) -> bool:
+        url = f"{self.base_url}/message/sendText/{self.instance}"
+        payload = {
+            "number": numero,
+            "text": texto,
+            "options": {
+                "delay": 1200,
+                "presence": "composing",
+                "linkPreview": False,
+            },
+        }
+        try:
+            resp = self.sessao.post(url, json=payload, timeout=15)
+        except requests.RequestException as e:
+            logger.error(f"[WHATSAPP] Erro ao enviar alerta: {e}")
+            return False
+        msg = f"[WHATSAPP] HTTP {resp.status_code} - {resp.text[:200]}"
+        if resp.status_code >= 400:
+            logger.error(msg)
+            return False
+        logger.info(msg)
+        return True
+
+    def _devidos(self, agora: float) -> list:
+        return [p for p in self._pendentes if p["proxima_em"] <= agora]
+
+    def _laco(self):
+        while True:
+            with self._cond:
+                while not self._parar and not self._devidos(time.time()):
+                    proximas = [p["proxima_em"] for p in self._pendentes]
+                    espera = min(proximas) - time.time() if proximas else None
+                    self._cond.wait(espera)
+                parar = self._parar
+
+            # agrupamento: dá tempo para os outros alertas do mesmo ciclo chegarem
+            if not parar and self.janela_agrupamento_s:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._parar, self.janela_agrupamento_s)
+
+            with self._cond:
+                lote = self._devidos(time.time()) if not self._parar else list(self._pendentes)
+                parar = self._parar
+            if not lote and parar:
+                return
+
+            por_numero: dict[str, list] = {}
+            for item in lote:
+                por_numero.setdefault(item["numero"], []).append(item)
+
+            for numero, itens in por_numero.items():
+                ok = self._enviar(numero, self._montar(itens))
+                with self._cond:
+                    ids = {item["id"] for item in itens}
+                    if ok:
+                        self._pendentes = [p for p in self._pendentes if p["id"] not in ids]
+                    else:
+                        self._reagendar(itens)
+                    self._persistir()
+
+            if parar:
+                return
+
+    def _reagendar(self, itens: list):
+        """Chamado com self._cond adquirido."""
+        agora = time.time()
+        for item in itens:
+            item["tentativas"] += 1
+            if item["tentativas"] >= self.max_tentativas:
+                msg = (
+                    f"[WHATSAPP] Alerta descartado após {item['tentativas']} "
+                    f"tentativas: {item['chave']}"
+                )
+                logger.error(msg)
+                self._pendentes = [p for p in self._pendentes if p["id"] != item["id"]]
+                continue
+            item["proxima_em"] = agora + self.backoff_s * 2 ** (item["tentativas"] - 1)
@@ -0,0 +1,126 @@
+"""
+Cache em memória do último status de cada usina e placa.
+
+Carregado uma vez de usinas_status/placas_status (ou de um snapshot local
+recente, na partida a frio do cron) e atualizado a cada gravação do
+EscritorCiclo. A detecção de mudança deixa de consultar o banco.
+"""
+import os
+import json
+import time
+import logging
+import threading
+
+from comum.db import get_db_connection
+
+logger = logging.getLogger("robo_solar")
+
+SNAPSHOT_PADRAO = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "cache", "status_snapshot.json"
+)
+
+
+class CacheStatus:
+    def __init__(self, caminho_snapshot: str = None, validade_snapshot_s: int = None):
+        self.caminho_snapshot = caminho_snapshot or os.getenv(
+            "STATUS_SNAPSHOT", SNAPSHOT_PADRAO
+        )
+        # o robô é o único escritor dessas tabelas; um snapshot recente
+        # reflete o banco e evita as consultas na partida do cron
+        self.validade_snapshot_s = validade_snapshot_s or int(
+            os.getenv("STATUS_SNAPSHOT_VALIDADE_S", "900")
+        )
+        self._usinas: dict[str, str] = {}
+        self._placas: dict[str, dict[str, str]] = {}
+        # epoch da última linha de histórico gravada por placa (heartbeat)
+        self._historico_placas: dict[str, dict[str, float]] = {}
+        self._carregado = False
+        self._lock = threading.RLock()
+
+    def _carregar_snapshot(self) -> bool:
+        if not self.caminho_snapshot or not os.path.exists(self.caminho_snapshot):
+            return False
+        idade = time.time() - os.path.getmtime(self.caminho_snapshot)
+        if idade > self.validade_snapshot_s:
+            return False
+        try:
+            with open(self.caminho_snapshot, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+            self._usinas = dados["usinas"]
+            self._placas = dados["placas"]
+            self._historico_placas = dados.get("historico_placas", {})
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"[CACHE] Snapshot ilegível, recarregando do banco: {e}")
+            return False
+        logger.info(f"[CACHE] Status carregado do snapshot ({idade:.0f}s atrás)")
+        return True
+
+    def _carregar_banco(self):
+        conn = get_db_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT nome_usina, status FROM usinas_status")
+            self._usinas = {nome: status for nome, status in cur.fetchall()}
+            cur.execute("SELECT nome_usina, codigo_placa, status FROM placas_status")
+            self._placas = {}
+            for nome, codigo, status in cur.fetchall():
+                self._placas.setdefault(nome, {})[codigo] = status
+        finally:
+            cur.close()
+            conn.close()
+        logger.info(f"[CACHE] Status carregado do banco ({len(self._usinas)} usinas)")
+
+    def carregar(self, forcar_banco: bool = False):
+        with self._lock:
+            if forcar_banco or not self._carregar_snapshot():
+                self._carregar_banco()
+            self._carregado = True
+
+    def _garantir(self):
+        if not self._carregado:
+            self.carregar()
+
+    def status_usina(self, nome_usina: str):
+        with self._lock:
+            self._garantir()
+            return self._usinas.get(nome_usina)
+
+    def status_placa(self, nome_usina: str, codigo_placa: str):
+        with self._lock:
+            self._garantir()
+            return self._placas.get(nome_usina, {}).get(codigo_placa)
+
+    def atualizar_usina(self, nome_usina: str, status: str):
+        with self._lock:
+            self._usinas[nome_usina] = status
+
+    def atualizar_placa(self, nome_usina: str, codigo_placa: str, status: str):
+        with self._lock:
+            self._placas.setdefault(nome_usina, {})[codigo_placa] = status
+
+    def ultimo_historico_placa(self, nome_usina: str, codigo_placa: str):
+        """Epoch da última linha de histórico da placa, ou None se desconhecido."""
+        with self._lock:
+            return self._historico_placas.get(nome_usina, {}).get(codigo_placa)
+
+    def marcar_historico_placa(self, nome_usina: str, codigo_placa: str, quando: float):
+        with self._lock:
+            self._historico_placas.setdefault(nome_usina, {})[codigo_placa] = quando
+
+    def salvar_snapshot(self):
+        if not self.caminho_snapshot:
+            return
+        with self._lock:
+            dados = {
+                "usinas": self._usinas,
+                "placas": self._placas,
+                "historico_placas": self._historico_placas,
+            }
+            try:
+                os.makedirs(os.path.dirname(self.caminho_snapshot), exist_ok=True)
+                tmp = f"{self.caminho_snapshot}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(dados, f, ensure_ascii=False)
+                os.replace(tmp, self.caminho_snapshot)
+            except OSError as e:
+                logger.warning(f"[CACHE] Não foi possível salvar snapshot: {e}")
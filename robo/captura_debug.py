@@ -0,0 +1,95 @@
+"""
+Capturas de debug (screenshots/HTML) das checagens Selenium.
+
+Modos (DEBUG_CAPTURA):
+  - "buffer" (padrão): screenshots dos passos ficam num buffer circular
+    em memória e só vão para debug/ se a checagem falhar;
+  - "falha": nenhum screenshot nos passos, só o da falha + HTML;
+  - "trace": grava todos os passos em disco (investigação).
+
+O diretório debug/ é limitado a DEBUG_MAX_MB; os arquivos mais antigos
+são apagados primeiro.
+"""
+import os
+import re
+import logging
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger("robo_solar")
+
+DEBUG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "debug")
+MODOS = ("buffer", "falha", "trace")
+
+
+def rotacionar(diretorio: str, max_mb: float):
+    """Apaga os arquivos mais antigos até o diretório caber em max_mb."""
+    try:
+        arquivos = [
+            (e.stat().st_mtime, e.stat().st_size, e.path)
+            for e in os.scandir(diretorio)
+            if e.is_file()
+        ]
+    except OSError:
+        return
+    total = sum(tamanho for _, tamanho, _ in arquivos)
+    limite = max_mb * 1024 * 1024
+    for _, tamanho, caminho in sorted(arquivos):
+        if total <= limite:
+            break
+        try:
+            os.remove(caminho)
+            total -= tamanho
+        except OSError:
+            continue
+
+
+class CapturaDebug:
+    def __init__(self, driver, nome: str, modo: str = None):
+        self.driver = driver
+        self.nome = nome
+        self.modo = modo or os.getenv("DEBUG_CAPTURA", "buffer")
+        if self.modo not in MODOS:
+            self.modo = "buffer"
+        self.max_mb = float(os.getenv("DEBUG_MAX_MB", "50"))
+        self._buffer = deque(maxlen=int(os.getenv("DEBUG_BUFFER_PASSOS", "6")))
+        self._prefixo = re.sub(r"[^A-Za-z0-9 _-]+", "_", nome)
+        self._inicio = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    def _gravar(self, rotulo: str, conteudo, binario: bool = True):
+        os.makedirs(DEBUG_DIR, exist_ok=True)
+        ext = "png" if binario else "html"
+        caminho = os.path.join(
+            DEBUG_DIR, f"{self._prefixo}_{self._inicio}_{rotulo}.{ext}"
+        )
+        modo = "wb" if binario else "w"
+        with open(caminho, modo, **({} if binario else {"encoding": "utf-8"})) as f:
+            f.write(conteudo)
+
+    def passo(self, rotulo: str):
+        if self.modo == "falha":
+            return
+        try:
+            png = self.driver.get_screenshot_as_png()
+        except Exception:
+            return
+        if self.modo == "trace":
+            self._gravar(rotulo, png)
+            rotacionar(DEBUG_DIR, self.max_mb)
+        else:
+            self._buffer.append((rotulo, png))
+
+    def falha(self):
+        """Despeja os passos em memória + screenshot e HTML do momento do erro."""
+        try:
+            for rotulo, png in self._buffer:
+                self._gravar(rotulo, png)
+            self._buffer.clear()
+            self._gravar("99_erro", self.driver.get_screenshot_as_png())
+            self._gravar("erro", self.driver.page_source, binario=False)
+            msg = f"[{self.nome}] Capturas de debug gravadas em debug/ ({self._inicio})"
+            logger.info(msg)
+        except Exception as e:
+            logger.warning(f"[{self.nome}] Falha ao gravar capturas de debug: {e}")
+        finally:
+            rotacionar(DEBUG_DIR, self.max_mb)
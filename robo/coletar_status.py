@@ -3,20 +3,15 @@
 Robô Solar Dashboard - Coleta status das usinas e grava no MariaDB.
 """
 import os
-import base64
-import json
-import requests
+import sys
+import argparse
+import fcntl
+import time
 import logging
 from logging.handlers import RotatingFileHandler
-from requests.exceptions import HTTPError
 from datetime import datetime, timedelta, timezone
 
 from dotenv import load_dotenv
-import mysql.connector
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import (
     TimeoutException,
     NoSuchElementException,
@@ -27,6 +22,38 @@ from selenium.webdriver.support import expected_conditions as EC
 
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env"))
 
+# raiz do projeto no path para os módulos compartilhados (comum/)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from comum.cookies_info import info_arquivo, info_todos  # noqa: E402
+from comum.db import verificar_saude  # noqa: E402
+from agendador import AgendadorColeta  # noqa: E402
+from alertas import DespachanteAlertas  # noqa: E402
+from motor_alertas import MotorAlertas  # noqa: E402
+from cache_status import CacheStatus  # noqa: E402
+from captura_debug import CapturaDebug  # noqa: E402
+from escritor_ciclo import EscritorCiclo  # noqa: E402
+from growatt_api import ClienteGrowatt, ErroGrowatt  # noqa: E402
+from isolarcloud_api import ClienteISolarCloud, ErroISolarCloud  # noqa: E402
+from sessoes import ArmazemSessoes  # noqa: E402
+from supervisor_navegador import SupervisorNavegador  # noqa: E402
+from solarman_api import (  # noqa: E402
+    ClienteSolarman,
+    ErroSolarman,
+    checar_solarman_http,
+    mapear_status_dispositivo,
+    status_geral_por_placas,
+)
+from motor_coleta import MotorColeta  # noqa: E402
+from pool_drivers import PoolDrivers  # noqa: E402
+from prontidao import (  # noqa: E402
+    Prontidao,
+    dom_completo,
+    elemento_presente,
+    texto_visivel,
+    xpath_clicavel,
+)
+
 # Diretório e arquivo de log
 LOG_DIR = os.path.join(os.path.dirname(__file__), "..", "logs")
 os.makedirs(LOG_DIR, exist_ok=True)
@@ -72,6 +99,7 @@ USINAS = [
         "btn_sel": "button.hasColorBtn.loginB",
         "status_sel": "span.green",
         "online_texto": "connected",
+        "timeout_prontidao": 40,  # orçamento (s) das esperas Selenium
     },
     {
         "nome": "UFV CASA 4",
@@ -81,6 +109,10 @@ USINAS = [
         "cookie_file": "cookies/cookies_solarman.pkl",
         "status_sel": "span.station-status",
         "online_texto": "normal",
+        "timeout_prontidao": 45,
+        # JSON do portal direto com os cookies; navegador só como fallback
+        "usa_api_http": True,
+        "station_id_env": "SOLARMAN_STATION_ID",
     },
     {
         "nome": "UFV-HELENA-1",
@@ -98,10 +130,13 @@ USINAS = [
         "btn_sel": "button.hasColorBtn.loginB",
         "status_sel": "span.green",
         "online_texto": "connected",
+        "timeout_prontidao": 40,
     },
     {
         "nome": "UFV HELENA-2",
         "responsavel": "Edson - 85988066711",
+        "tipo": "isolarcloud",  # API HTTP primeiro, Selenium como fallback
+        "ps_id_env": "ISOLARCLOUD_PS_ID",
         "url_login": "https://web3.isolarcloud.com.hk/#/login",
         "usuario_env": "SITE4_USER",
         "senha_env": "SITE4_PASS",
@@ -110,98 +145,57 @@ USINAS = [
         "btn_sel": "div.el-form-item__content button.el-button",
         "status_sel": "td.el-table_1_column_4.plant-list-cell.el-table__cell div.plant-status-column",
         "online_texto": "Normal",
+        "timeout_prontidao": 60,  # SPA Vue do iSolarCloud é a mais lenta
+        # modo daemon: intervalos por regra (ver agendador.py); o fallback
+        # Selenium é caro, então esta usina espaça mais quando estável
+        "intervalos": {"estavel": 1200, "noite": 3600},
     },
 ]
 # =============================================
 
+# Sessões Chrome aquecidas, compartilhadas por todas as checagens Selenium
+POOL_DRIVERS = PoolDrivers()
 
-def get_db_connection():
-    return mysql.connector.connect(
-        unix_socket="/var/run/mysqld/mysqld.sock",
-        user=os.getenv("DB_USER", "solar_user"),
-        password=os.getenv("DB_PASS"),
-        database=os.getenv("DB_NAME", "solar_monitor"),
-    )
+# Cookies/localStorage dos logins Selenium, reaproveitados entre execuções
+SESSOES = ArmazemSessoes()
 
+# Sessão HTTP e rate limit compartilhados por todas as usinas Growatt
+CLIENTE_GROWATT = ClienteGrowatt()
 
-def obter_status_anterior(nome_usina: str) -> str:
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT status
-        FROM usinas_status
-        WHERE nome_usina = %s
-        """,
-        (nome_usina,),
-    )
-    row = cur.fetchone()
-    cur.close()
-    conn.close()
-    return row[0] if row else None
-
-
-def salvar_status(nome_usina: str, status: str):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    agora = datetime.now()
-    cur.execute(
-        """
-        INSERT INTO usinas_status (nome_usina, status, updated_at)
-        VALUES (%s, %s, %s)
-        ON DUPLICATE KEY UPDATE
-            status = VALUES(status),
-            updated_at = VALUES(updated_at)
-        """,
-        (nome_usina, status, agora),
-    )
-    conn.commit()
-    cur.close()
-    conn.close()
-
-def salvar_status_placa(nome_usina: str, codigo_placa: str, status: str):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    agora = datetime.now()
-    cur.execute(
-        """
-        INSERT INTO placas_status (nome_usina, codigo_placa, status, updated_at)
-        VALUES (%s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE
-            status = VALUES(status),
-            updated_at = VALUES(updated_at)
-        """,
-        (nome_usina, codigo_placa, status, agora),
-    )
-    conn.commit()
-    cur.close()
-    conn.close()
+# Último status por usina/placa, carregado sob demanda (snapshot ou banco)
+CACHE_STATUS = CacheStatus()
+
+# Fila de alertas WhatsApp (envio em segundo plano, com caixa de saída)
+ALERTAS = DespachanteAlertas()
+
+# Histerese, oscilação, recuperação e escalonamento dos alertas
+MOTOR_ALERTAS = MotorAlertas(ALERTAS)
+
+# Workers de navegador com prazo rígido; criado só no processo principal
+# (dentro do worker fica None e as checagens usam o POOL_DRIVERS local)
+SUPERVISOR = None
+
+
+def encerrar_navegadores():
+    POOL_DRIVERS.encerrar()
 
-def salvar_status_historico(
-    nome_usina: str, status: str, origem: str = None, mensagem: str = None
-):
-    """
-    Salva uma linha de histórico sempre que o status mudar.
-    """
-    conn = get_db_connection()
-    cur = conn.cursor()
-    agora = datetime.now()
-
-    cur.execute(
-        """
-        INSERT INTO usinas_status_historico
-            (nome_usina, status, changed_at, origem, mensagem)
-        VALUES (%s, %s, %s, %s, %s)
-        """,
-        (nome_usina, status, agora, origem, mensagem),
-    )
 
-    conn.commit()
-    cur.close()
-    conn.close()
+def iniciar_supervisor():
+    global SUPERVISOR
+    if os.getenv("COLETA_ISOLAR_NAVEGADOR", "1") == "1":
+        SUPERVISOR = SupervisorNavegador(ao_encerrar=encerrar_navegadores)
 
 
-GROWATT_API_BASE = "https://openapi.growatt.com/v1"
+def encerrar_supervisor():
+    global SUPERVISOR
+    if SUPERVISOR is not None:
+        SUPERVISOR.encerrar()
+        SUPERVISOR = None
+
+
+def obter_status_anterior(nome_usina: str) -> str:
+    """Último status gravado (do cache em memória, sem ir ao banco)."""
+    return CACHE_STATUS.status_usina(nome_usina)
 
 
 def get_growatt_headers(cfg: dict):
@@ -223,23 +217,26 @@ def checar_usina_growatt_api(cfg: dict) -> str:
     limite_minutos_erro = 240
 
     try:
-        url = f"{GROWATT_API_BASE}/plant/data"
-        params = {"plant_id": plant_id}
-        resp = requests.get(
-            url,
-            headers=get_growatt_headers(cfg),
-            params=params,
-            timeout=15,
-        )
-
-        try:
-            resp.raise_for_status()
-        except HTTPError as http_err:
-            status_code = resp.status_code
-            msg = f"[{nome}] HTTP ERRO API Growatt ({status_code}): {http_err}"
-            logger.error(msg)
-            if 500 <= status_code < 600:
-                msg2 = f"[{nome}] API 5xx, tentando fallback via Selenium..."
+        token = get_growatt_headers(cfg)["token"]
+
+        # plant/list (compartilhado por todas as usinas do mesmo token)
+        # muitas vezes já basta; plant/data só quando falta last_update_time
+        resumo = CLIENTE_GROWATT.resumo_usina(token, plant_id)
+        if resumo and resumo.get("last_update_time"):
+            data = resumo
+        elif resumo and float(resumo.get("current_power", 0) or 0) > limite_kw:
+            msg = f"[{nome}] current_power = {resumo.get('current_power')} kW (plant/list)"
+            logger.info(msg)
+            return "ONLINE"
+        else:
+            try:
+                data = CLIENTE_GROWATT.dados_usina(token, plant_id)
+            except ErroGrowatt as e:
+                msg = f"[{nome}] ERRO API Growatt: {e}"
+                logger.error(msg)
+                if not e.recuperavel:
+                    return "ERRO"
+                msg2 = f"[{nome}] API indisponível/rate limit, tentando fallback via Selenium..."
                 logger.warning(msg2)
                 try:
                     return checar_usina(cfg)  # fallback Selenium (se configurado)
@@ -248,26 +245,7 @@ def checar_usina_growatt_api(cfg: dict) -> str:
                     logger.error(msg3)
                     status_antigo = obter_status_anterior(nome)
                     return status_antigo or "ERRO"
-            return "ERRO"
 
-        payload = resp.json()
-        if payload.get("error_code") != 0:
-            err = payload.get("error_msg")
-            msg = f"[{nome}] ERRO API: {err}"
-            logger.error(msg)
-            if err == "error_frequently_access":
-                msg2 = f"[{nome}] Rate limit na API, tentando fallback via Selenium..."
-                logger.warning(msg2)
-                try:
-                    return checar_usina(cfg)
-                except Exception as e2:
-                    msg3 = f"[{nome}] Fallback Selenium também falhou: {e2}"
-                    logger.error(msg3)
-                    status_antigo = obter_status_anterior(nome)
-                    return status_antigo or "ERRO"
-            return "ERRO"
-
-        data = payload.get("data", {}) or {}
         current_power = float(data.get("current_power", 0) or 0)
         last_update_raw = (data.get("last_update_time") or "").strip()
 
@@ -325,157 +303,190 @@ def checar_usina_growatt_api(cfg: dict) -> str:
             return "ERRO"
 
 
-def enviar_whatsapp_alerta(
-    nome_usina: str, status_novo: str, status_antigo: str = None, responsavel: str = ""
-):
-    base_url = os.getenv("EVOLUTION_BASE_URL", "http://10.254.2.210:5080")
-    instance = os.getenv("EVOLUTION_INSTANCE", "Solar")
-    api_key = os.getenv("EVOLUTION_API_KEY", "F0R$@tl1")
-    numero = os.getenv("WHATSAPP_NUMBER_ALERTA", "5585981699862")
-
-    url = f"{base_url}/message/sendText/{instance}"
-
-    texto = (
-        "ALERTA MONITORAMENTO SOLAR\n\n"
-        f"Usina: {nome_usina}\n"
-        f"Status atual: {status_novo}\n"
-        f"Responsável técnico: {responsavel or 'não cadastrado'}\n"
-        f"Data/hora: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
-    )
-
-    payload = {
-        "number": numero,
-        "text": texto,
-        "options": {
-            "delay": 1200,
-            "presence": "composing",
-            "linkPreview": False,
-        },
-    }
-
-    headers = {
-        "apikey": api_key,
-        "Content-Type": "application/json",
-    }
-
-    try:
-        resp = requests.post(url, headers=headers, json=payload, timeout=15)
-        msg = f"[WHATSAPP] HTTP {resp.status_code} - {resp.text}"
-        logger.info(msg)
-    except Exception as e:
-        msg = f"[WHATSAPP] Erro ao enviar alerta: {e}"
-        logger.error(msg)
-
-
-def criar_driver():
-    options = Options()
-    options.add_argument("--headless=new")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--remote-debugging-port=9222")
-
-    options.binary_location = "/usr/bin/google-chrome"
-
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
-    return driver
+XPATH_BANNER_COOKIES = "//button[contains(., 'I disagree')]"
+
+XPATH_STATUS_CONEXAO = (
+    "//td[contains(normalize-space(.), 'Connection Status')]//span/span"
+)
+
+XPATH_MODAL_FECHAR = (
+    "//div[contains(@class,'ant-modal-wrap')]"
+    "//button[contains(@class,'ant-modal-close')]"
+    " | "
+    "//div[contains(@class,'ant-modal-wrap')]"
+    "//button[normalize-space(.)='Fechar' or normalize-space(.)='OK']"
+)
+
+XPATH_MENU_DISPOSITIVO = (
+    "//div[contains(@class, 'items') "
+    "and contains(., 'Informações') "
+    "and contains(., 'dispositivo')]"
+)
+
+
+XPATH_LINHAS_NOME = (
+    "//div[contains(@class,'table-title-col') "
+    "and contains(., 'Nome') "
+    "and contains(., 'dispositivo')]"
+    "/ancestor::div/following-sibling::div"
+    "//table/tbody/tr"
+)
+
+XPATH_LINHAS_STATUS = (
+    "//div[contains(@class,'table-title-col') "
+    "and contains(., 'Status do dispositivo')]"
+    "/ancestor::div/following-sibling::div"
+    "//table/tbody/tr"
+)
+
+# Nome: cada tr -> td -> 2 spans: 1) 'Logger', 2) código (4139773808, etc)
+# Status: cada tr -> primeiro td = texto do status ("Conectados", etc)
+# As duas tabelas são metades da mesma tabela ant-design (colunas fixas),
+# então cada tr carrega o mesmo data-row-key nas duas.
+JS_TABELAS_DISPOSITIVO = """
+const linhas = (xpath) => {
+    const r = document.evaluate(xpath, document, null,
+        XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const out = [];
+    for (let i = 0; i < r.snapshotLength; i++) out.push(r.snapshotItem(i));
+    return out;
+};
+const chave = (tr, i) => tr.getAttribute("data-row-key") || ("idx-" + i);
+const nomes = linhas(arguments[0]).map((tr, i) => {
+    const spans = tr.querySelectorAll("td span");
+    return {
+        chave: chave(tr, i),
+        codigo: spans.length >= 2 ? (spans[1].innerText || "").trim() : "",
+    };
+});
+const status = linhas(arguments[1]).map((tr, i) => {
+    const td = tr.querySelector("td");
+    return {
+        chave: chave(tr, i),
+        texto: td ? (td.innerText || "").trim().toLowerCase() : "erro",
+    };
+});
+if (!nomes.length || !status.length) return null;
+return {nomes: nomes, status: status};
+"""
 
 
 def checar_usina(cfg: dict) -> str:
     """Faz login em uma usina e detecta se está ONLINE ou OFFLINE."""
-    driver = criar_driver()
+    if SUPERVISOR is not None:
+        return SUPERVISOR.executar(checar_usina, cfg)
+    with POOL_DRIVERS.emprestar() as driver:
+        return _checar_usina(driver, cfg)
+
+
+def _checar_usina(driver, cfg: dict) -> str:
     status_final = "ERRO"
 
     nome = cfg["nome"]
-    debug_dir = os.path.join(os.path.dirname(__file__), "..", "debug")
-    os.makedirs(debug_dir, exist_ok=True)
+    pronto = Prontidao(driver, nome, cfg.get("timeout_prontidao"))
+    captura = CapturaDebug(driver, nome)
 
     try:
-        msg = f"[{nome}] 1. Acessando URL: {cfg['url_login']}"
-        logger.info(msg)
-        driver.get(cfg["url_login"])
-
-        import time
-
-        msg = f"[{nome}] 1.5. Aguardando SPA carregar..."
-        logger.info(msg)
-        time.sleep(8)
-
-        try:
-            msg = f"[{nome}] 1.6. Fechando banner cookies..."
-            logger.info(msg)
-            cookie_disagree = driver.find_element(
-                By.XPATH, "//button[contains(., 'I disagree')]"
+        # 0) Sessão salva de uma execução anterior evita o login completo
+        el_status = None
+        if SESSOES.restaurar(nome, driver):
+            el_status = pronto.tentar(
+                EC.any_of(
+                    texto_visivel(cfg["status_sel"]),
+                    EC.presence_of_element_located((By.XPATH, XPATH_STATUS_CONEXAO)),
+                ),
+                "0 sessão reaproveitada",
+                timeout=cfg.get("timeout_sessao", 10),
             )
-            cookie_disagree.click()
-            time.sleep(2)
-            msg = f"[{nome}] 1.7. Cookies fechados"
+            if el_status is None:
+                msg = f"[{nome}] 0. Sessão salva não vale mais, fazendo login..."
+                logger.info(msg)
+                SESSOES.descartar(nome)
+                driver.delete_all_cookies()
+            else:
+                msg = f"[{nome}] 0. Sessão salva reaproveitada, sem login."
+                logger.info(msg)
+
+        if el_status is None:
+            msg = f"[{nome}] 1. Acessando URL: {cfg['url_login']}"
             logger.info(msg)
-        except Exception:
-            msg = f"[{nome}] 1.7. Sem banner cookies"
+            driver.get(cfg["url_login"])
+
+            msg = f"[{nome}] 1.5. Aguardando SPA carregar..."
             logger.info(msg)
+            pronto.pagina_pronta("1.5 SPA carregada", espera_fixa=8, timeout=15)
 
-        driver.save_screenshot(f"{debug_dir}/{nome}_01_inicial.png")
+            try:
+                msg = f"[{nome}] 1.6. Fechando banner cookies..."
+                logger.info(msg)
+                cookie_disagree = driver.find_element(By.XPATH, XPATH_BANNER_COOKIES)
+                cookie_disagree.click()
+                pronto.tentar(
+                    EC.invisibility_of_element_located((By.XPATH, XPATH_BANNER_COOKIES)),
+                    "1.7 banner fechado",
+                    espera_fixa=2,
+                    timeout=5,
+                )
+                msg = f"[{nome}] 1.7. Cookies fechados"
+                logger.info(msg)
+            except Exception:
+                msg = f"[{nome}] 1.7. Sem banner cookies"
+                logger.info(msg)
 
-        wait = WebDriverWait(driver, 30)
+            captura.passo("01_inicial")
 
-        msg = f"[{nome}] 2. Procurando campo usuário: {cfg['user_sel']}"
-        logger.info(msg)
-        el_user = wait.until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, cfg["user_sel"]))
-        )
-        el_user.clear()
-        el_user.send_keys(os.getenv(cfg["usuario_env"]))
-        driver.save_screenshot(f"{debug_dir}/{nome}_02_usuario_preenchido.png")
+            msg = f"[{nome}] 2. Procurando campo usuário: {cfg['user_sel']}"
+            logger.info(msg)
+            el_user = pronto.aguardar(
+                elemento_presente(cfg["user_sel"]), "2 campo usuário", timeout=30
+            )
+            el_user.clear()
+            el_user.send_keys(os.getenv(cfg["usuario_env"]))
+            captura.passo("02_usuario_preenchido")
 
-        msg = f"[{nome}] 3. Procurando campo senha: {cfg['pass_sel']}"
-        logger.info(msg)
-        el_pass = driver.find_element(By.CSS_SELECTOR, cfg["pass_sel"])
-        el_pass.clear()
-        el_pass.send_keys(os.getenv(cfg["senha_env"]))
-        driver.save_screenshot(f"{debug_dir}/{nome}_03_senha_preenchida.png")
+            msg = f"[{nome}] 3. Procurando campo senha: {cfg['pass_sel']}"
+            logger.info(msg)
+            el_pass = driver.find_element(By.CSS_SELECTOR, cfg["pass_sel"])
+            el_pass.clear()
+            el_pass.send_keys(os.getenv(cfg["senha_env"]))
+            captura.passo("03_senha_preenchida")
 
-        msg = f"[{nome}] 4. Procurando botão: {cfg['btn_sel']}"
-        logger.info(msg)
-        btn = driver.find_element(By.CSS_SELECTOR, cfg["btn_sel"])
-        driver.execute_script("arguments[0].scrollIntoView(true);", btn)
-        driver.save_screenshot(f"{debug_dir}/{nome}_04_antes_clicar.png")
+            msg = f"[{nome}] 4. Procurando botão: {cfg['btn_sel']}"
+            logger.info(msg)
+            btn = driver.find_element(By.CSS_SELECTOR, cfg["btn_sel"])
+            driver.execute_script("arguments[0].scrollIntoView(true);", btn)
+            captura.passo("04_antes_clicar")
 
-        try:
-            btn.click()
-        except Exception:
-            driver.execute_script("arguments[0].click();", btn)
+            try:
+                btn.click()
+            except Exception:
+                driver.execute_script("arguments[0].click();", btn)
 
-        msg = f"[{nome}] 5. Login clicado, aguardando..."
-        logger.info(msg)
-        time.sleep(5)
-        driver.save_screenshot(f"{debug_dir}/{nome}_05_apos_login.png")
+            msg = f"[{nome}] 5. Login clicado, aguardando..."
+            logger.info(msg)
+            pronto.pagina_pronta("5 pós-login", espera_fixa=5, timeout=15)
+            captura.passo("05_apos_login")
 
-        msg = f"[{nome}] 6. Procurando status: {cfg['status_sel']}"
-        logger.info(msg)
+            msg = f"[{nome}] 6. Procurando status: {cfg['status_sel']}"
+            logger.info(msg)
 
-        try:
-            el_status = wait.until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, cfg["status_sel"]))
-            )
-        except TimeoutException:
-            msg = (
-                f"[{nome}] 6b. Não achei '{cfg['status_sel']}', "
-                f"tentando XPath do texto..."
-            )
-            logger.warning(msg)
-            el_status = wait.until(
-                EC.presence_of_element_located(
-                    (
-                        By.XPATH,
-                        "//td[contains(normalize-space(.), 'Connection Status')]//span/span",
-                    )
+            try:
+                el_status = pronto.aguardar(
+                    texto_visivel(cfg["status_sel"]), "6 status", timeout=30
+                )
+            except TimeoutException:
+                msg = (
+                    f"[{nome}] 6b. Não achei '{cfg['status_sel']}', "
+                    f"tentando XPath do texto..."
+                )
+                logger.warning(msg)
+                el_status = WebDriverWait(driver, 5).until(
+                    EC.presence_of_element_located((By.XPATH, XPATH_STATUS_CONEXAO))
                 )
-            )
 
-        driver.save_screenshot(f"{debug_dir}/{nome}_06_status_encontrado.png")
+            captura.passo("06_status_encontrado")
+
+            SESSOES.salvar(nome, driver)
 
         texto = (el_status.text or "").strip().lower()
         msg = f"[{nome}] 7. Texto lido: '{texto}'"
@@ -485,29 +496,32 @@ def checar_usina(cfg: dict) -> str:
             status_final = "ONLINE"
         else:
             status_final = "OFFLINE"
+        pronto.resumo()
 
     except Exception as e:
         msg = f"[{nome}] ERRO DETALHADO: {type(e).__name__}: {str(e)}"
         logger.error(msg)
-        driver.save_screenshot(f"{debug_dir}/{nome}_99_erro.png")
-
-        with open(f"{debug_dir}/{nome}_erro.html", "w", encoding="utf-8") as f:
-            f.write(driver.page_source)
+        captura.falha()
 
         status_final = "ERRO"
-    finally:
-        driver.quit()
 
     return status_final
 
 
 def checar_usina_cookies(cfg: dict) -> str:
     """Usina que usa cookies (sem login)."""
-    import pickle, json as json_mod, time
+    if SUPERVISOR is not None:
+        return SUPERVISOR.executar(checar_usina_cookies, cfg)
+    with POOL_DRIVERS.emprestar() as driver:
+        return _checar_usina_cookies(driver, cfg)
+
+
+def _checar_usina_cookies(driver, cfg: dict) -> str:
+    import pickle, json as json_mod
 
-    driver = criar_driver()
     status_final = "ERRO"
     nome = cfg["nome"]
+    pronto = Prontidao(driver, nome, cfg.get("timeout_prontidao"))
 
     cookie_path = os.path.join(os.path.dirname(__file__), "..", cfg["cookie_file"])
 
@@ -521,7 +535,7 @@ def checar_usina_cookies(cfg: dict) -> str:
             return "ERRO"
 
         driver.get(cfg["url_dashboard"])
-        time.sleep(2)
+        pronto.aguardar(dom_completo, "1 DOM inicial", espera_fixa=2, timeout=15)
 
         if cfg["cookie_file"].endswith(".pkl"):
             with open(cookie_path, "rb") as f:
@@ -541,11 +555,12 @@ def checar_usina_cookies(cfg: dict) -> str:
         msg = f"[{nome}] 2. Cookies carregados, acessando dashboard..."
         logger.info(msg)
         driver.refresh()
-        time.sleep(8)
 
         msg = f"[{nome}] 3. Procurando status: {cfg['status_sel']}"
         logger.info(msg)
-        el_status = driver.find_element(By.CSS_SELECTOR, cfg["status_sel"])
+        el_status = pronto.aguardar(
+            texto_visivel(cfg["status_sel"]), "3 status", espera_fixa=8
+        )
         texto = (el_status.text or "").strip().lower()
         msg = f"[{nome}] 4. Texto lido: '{texto}'"
         logger.info(msg)
@@ -556,16 +571,16 @@ def checar_usina_cookies(cfg: dict) -> str:
             status_final = "OFFLINE"
         else:
             status_final = "ERRO"
+        pronto.resumo()
 
     except Exception as e:
         msg = f"[{nome}] ERRO: {e}"
         logger.error(msg)
         status_final = "ERRO"
-    finally:
-        driver.quit()
 
     return status_final
 
+
 def checar_ufv_casa4_detalhado(cfg: dict) -> dict:
     """
     UFV CASA 4 (Solarman) com detalhe por placa.
@@ -579,10 +594,25 @@ def checar_ufv_casa4_detalhado(cfg: dict) -> dict:
         ]
       }
     """
-    import pickle, json as json_mod, time
+    if SUPERVISOR is not None:
+        return SUPERVISOR.executar(checar_ufv_casa4_detalhado, cfg)
+    with POOL_DRIVERS.emprestar() as driver:
+        info = _checar_ufv_casa4_detalhado(driver, cfg)
+
+    if info["status_geral"] is None:
+        # fallback: usa status geral via cookies como hoje (fora do
+        # empréstimo acima, para não segurar duas sessões do pool)
+        msg = f"[{cfg['nome']}] (detalhado) Nenhuma placa lida, usando status genérico..."
+        logger.warning(msg)
+        info["status_geral"] = checar_usina_cookies(cfg)
+    return info
+
+
+def _checar_ufv_casa4_detalhado(driver, cfg: dict) -> dict:
+    import pickle, json as json_mod
 
-    driver = criar_driver()
     nome = cfg["nome"]
+    pronto = Prontidao(driver, nome, cfg.get("timeout_prontidao"))
     status_geral = "ERRO"
     placas: list[dict] = []
 
@@ -598,7 +628,7 @@ def checar_ufv_casa4_detalhado(cfg: dict) -> dict:
             return {"status_geral": "ERRO", "placas": []}
 
         driver.get(cfg["url_dashboard"])
-        time.sleep(2)
+        pronto.aguardar(dom_completo, "(detalhado) 1 DOM inicial", espera_fixa=2, timeout=15)
 
         # aplica cookies
         if cfg["cookie_file"].endswith(".pkl"):
@@ -619,24 +649,29 @@ def checar_ufv_casa4_detalhado(cfg: dict) -> dict:
         msg = f"[{nome}] (detalhado) 2. Cookies carregados, acessando dashboard..."
         logger.info(msg)
         driver.refresh()
-        time.sleep(8)
-
-        wait = WebDriverWait(driver, 30)
+        pronto.aguardar(
+            EC.any_of(
+                EC.presence_of_element_located((By.XPATH, XPATH_MENU_DISPOSITIVO)),
+                EC.presence_of_element_located((By.XPATH, XPATH_MODAL_FECHAR)),
+            ),
+            "(detalhado) 2 dashboard",
+            espera_fixa=8,
+        )
 
         # 3) Clicar em "Informações do dispositivo"
         try:
             msg = f"[{nome}] (detalhado) 3.1 Verificando se há modal aberto..."
             logger.info(msg)
-            modal_close_btn = driver.find_element(
-                By.XPATH,
-                "//div[contains(@class,'ant-modal-wrap')]"
-                "//button[contains(@class,'ant-modal-close')]"
-                " | "
-                "//div[contains(@class,'ant-modal-wrap')]"
-                "//button[normalize-space(.)='Fechar' or normalize-space(.)='OK']"
-            )
+            modal_close_btn = driver.find_element(By.XPATH, XPATH_MODAL_FECHAR)
             modal_close_btn.click()
-            time.sleep(2)
+            pronto.tentar(
+                EC.invisibility_of_element_located(
+                    (By.XPATH, "//div[contains(@class,'ant-modal-wrap')]")
+                ),
+                "(detalhado) 3.1 modal fechado",
+                espera_fixa=2,
+                timeout=5,
+            )
             logger.info(f"[{nome}] (detalhado) Modal fechado.")
         except Exception:
             logger.info(f"[{nome}] (detalhado) Nenhum modal para fechar.")
@@ -644,310 +679,354 @@ def checar_ufv_casa4_detalhado(cfg: dict) -> dict:
         # 4) Clicar em "Informações do dispositivo"
         msg = f"[{nome}] (detalhado) 3. Clicando em 'Informações do dispositivo'..."
         logger.info(msg)
-        menu_dispositivo = wait.until(
-            EC.element_to_be_clickable(
-                (
-                    By.XPATH,
-                    "//div[contains(@class, 'items') "
-                    "and contains(., 'Informações') "
-                    "and contains(., 'dispositivo')]",
-                )
-            )
+        menu_dispositivo = pronto.aguardar(
+            xpath_clicavel(XPATH_MENU_DISPOSITIVO), "(detalhado) 3 menu", timeout=30
         )
         driver.execute_script("arguments[0].click();", menu_dispositivo)
-        time.sleep(5)
-
-        # 4) Ler tabela de "Nome do dispositivo"
-        # cada tr -> td -> 2 spans: 1) 'Logger', 2) código (4139773808, etc)
-        linhas_nome = wait.until(
-            EC.presence_of_all_elements_located(
-                (
-                    By.XPATH,
-                    "//div[contains(@class,'table-title-col') "
-                    "and contains(., 'Nome') "
-                    "and contains(., 'dispositivo')]"
-                    "/ancestor::div/following-sibling::div"
-                    "//table/tbody/tr",
-                )
-            )
+        pronto.pagina_pronta("(detalhado) 4 tabelas", espera_fixa=5, timeout=15)
+
+        # 4) Ler as tabelas "Nome do dispositivo" e "Status do dispositivo"
+        # em uma única chamada ao navegador (que também serve de espera:
+        # só devolve quando as duas tabelas têm linhas)
+        tabelas = pronto.aguardar(
+            lambda d: d.execute_script(
+                JS_TABELAS_DISPOSITIVO, XPATH_LINHAS_NOME, XPATH_LINHAS_STATUS
+            ),
+            "(detalhado) 5 leitura das tabelas",
         )
 
-        codigos: list[str] = []
-        for tr in linhas_nome:
-            try:
-                spans = tr.find_elements(By.XPATH, ".//td//span")
-                if len(spans) >= 2:
-                    codigo = (spans[1].text or "").strip()
-                    if codigo:
-                        codigos.append(codigo)
-            except Exception:
+        # 5) Combinar por chave da linha (data-row-key), não por posição
+        status_por_chave = {
+            linha["chave"]: linha["texto"] for linha in tabelas["status"]
+        }
+        for linha in tabelas["nomes"]:
+            codigo = linha["codigo"]
+            if not codigo:
                 continue
-
-        msg = f"[{nome}] (detalhado) Codigos lidos: {codigos}"
-        logger.info(msg)
-
-        # 5) Ler tabela de "Status do dispositivo"
-        # cada tr -> primeiro td = texto do status ("Conectados", etc)
-        linhas_status = wait.until(
-            EC.presence_of_all_elements_located(
-                (
-                    By.XPATH,
-                    "//div[contains(@class,'table-title-col') "
-                    "and contains(., 'Status do dispositivo')]"
-                    "/ancestor::div/following-sibling::div"
-                    "//table/tbody/tr",
-                )
+            texto_status = status_por_chave.pop(linha["chave"], None)
+            if texto_status is None:
+                msg = f"[{nome}] (detalhado) Placa {codigo} sem linha de status"
+                logger.warning(msg)
+            placas.append(
+                {"codigo": codigo, "status": mapear_status_dispositivo(texto_status)}
             )
-        )
-
-        # garantir que usamos só a mesma quantidade de códigos
-        n = min(len(codigos), len(linhas_status))
-        status_list: list[str] = []
-        for i in range(n):
-            tr = linhas_status[i]
-            try:
-                td_status = tr.find_element(By.XPATH, ".//td[1]")
-                texto = (td_status.text or "").strip().lower()
-                status_list.append(texto)
-            except Exception:
-                status_list.append("erro")
 
+        if status_por_chave:
+            msg = (
+                f"[{nome}] (detalhado) {len(status_por_chave)} linhas de status "
+                f"sem dispositivo correspondente: {list(status_por_chave)}"
+            )
+            logger.warning(msg)
 
-        msg = f"[{nome}] (detalhado) Status lidos: {status_list}"
+        msg = f"[{nome}] (detalhado) Placas lidas: {placas}"
         logger.info(msg)
 
-        # 6) Montar lista de placas combinando por índice
-        n = min(len(codigos), len(status_list))
-        for i in range(n):
-            codigo = codigos[i]
-            texto_status = status_list[i]
-
-            if "conectado" in texto_status:   # "Conectados"
-                st = "ONLINE"
-            elif "desconectado" in texto_status or "offline" in texto_status:
-                st = "OFFLINE"
-            else:
-                st = "ERRO"
-
-            placas.append({"codigo": codigo, "status": st})
+        # None sinaliza fallback para checar_ufv_casa4_detalhado
+        status_geral = status_geral_por_placas(placas)
 
-        if not placas:
-            # fallback: usa status geral via cookies como hoje
-            msg = f"[{nome}] (detalhado) Nenhuma placa lida, usando status genérico..."
-            logger.warning(msg)
-            status_geral = checar_usina_cookies(cfg)
-        else:
-            if any(p["status"] == "OFFLINE" for p in placas):
-                status_geral = "OFFLINE"
-            elif all(p["status"] == "ONLINE" for p in placas):
-                status_geral = "ONLINE"
-            else:
-                status_geral = "ERRO"
+        pronto.resumo()
 
     except Exception as e:
         msg = f"[{nome}] (detalhado) ERRO: {e}"
         logger.error(msg)
         status_geral = "ERRO"
-    finally:
-        driver.quit()
 
     return {"status_geral": status_geral, "placas": placas}
 
 
 
-def verificar_expiracao_cookies(cookie_file: str, dias_aviso: int = 5) -> dict:
+_CLIENTES_SOLARMAN: dict = {}
+
+
+def cliente_solarman(cfg: dict) -> ClienteSolarman:
+    """Um cliente (sessão HTTP) por arquivo de cookies, reaproveitado entre ciclos."""
+    cookie_path = os.path.join(os.path.dirname(__file__), "..", cfg["cookie_file"])
+    if cookie_path not in _CLIENTES_SOLARMAN:
+        station_id = os.getenv(cfg.get("station_id_env", ""), "") or None
+        _CLIENTES_SOLARMAN[cookie_path] = ClienteSolarman(cookie_path, station_id)
+    return _CLIENTES_SOLARMAN[cookie_path]
+
+
+_CLIENTES_ISOLARCLOUD: dict = {}
+
+
+def cliente_isolarcloud(cfg: dict) -> ClienteISolarCloud:
+    """Um cliente por usina, mantendo o token entre ciclos (e em disco)."""
+    nome = cfg["nome"]
+    if nome not in _CLIENTES_ISOLARCLOUD:
+        cliente = ClienteISolarCloud(
+            os.getenv(cfg["usuario_env"]), os.getenv(cfg["senha_env"])
+        )
+        if not cliente.configurado():
+            # avisa uma vez por processo; as checagens vão direto ao navegador
+            msg = (
+                f"[{nome}] ISOLARCLOUD_APPKEY/ISOLARCLOUD_ACCESS_KEY não "
+                "configurados, API HTTP desativada (só navegador)."
+            )
+            logger.warning(msg)
+        _CLIENTES_ISOLARCLOUD[nome] = cliente
+    return _CLIENTES_ISOLARCLOUD[nome]
+
+
+# Aviso de cookies perto de vencer: um por arquivo a cada N horas
+DIAS_AVISO_COOKIES = int(os.getenv("COOKIES_DIAS_AVISO", "5"))
+INTERVALO_AVISO_COOKIES_H = float(os.getenv("COOKIES_INTERVALO_AVISO_H", "24"))
+
+
+def avisar_expiracao_cookies():
+    """Avisos de expiração de todos os arquivos em cookies/ (log + WhatsApp)."""
+    infos = info_todos(DIAS_AVISO_COOKIES)
+    # arquivo configurado numa usina mas ausente do diretório também avisa
+    for cfg in USINAS:
+        arquivo = os.path.basename(cfg.get("cookie_file", ""))
+        if arquivo and arquivo not in infos:
+            caminho = os.path.join(os.path.dirname(__file__), "..", cfg["cookie_file"])
+            infos[arquivo] = info_arquivo(caminho, DIAS_AVISO_COOKIES)
+
+    for arquivo, info in infos.items():
+        if not info["precisa_renovar"]:
+            continue
+
+        usinas = [
+            cfg["nome"]
+            for cfg in USINAS
+            if os.path.basename(cfg.get("cookie_file", "")) == arquivo
+        ]
+        alvo = ", ".join(usinas) or arquivo
+        dias = info["dias_restantes"]
+        if dias is not None and dias > 0:
+            msg = (
+                f"AVISO: Cookies de {alvo} expiram em {dias} dias "
+                f"({info['expira_em']}). Renove antes para evitar falhas!"
+            )
+        else:
+            msg = f"URGENTE: Cookies de {alvo} expiraram ou estão inválidos!"
+        logger.warning(msg)
+
+        ALERTAS.enfileirar(
+            f"cookies:{arquivo}",
+            f"ALERTA MONITORAMENTO SOLAR\n\n{msg}\nArquivo: cookies/{arquivo}",
+            resumo=msg,
+            janela_s=INTERVALO_AVISO_COOKIES_H * 3600,
+        )
+
+
+def coletar_usina(cfg: dict) -> dict:
     """
-    Verifica se cookies estão próximos de expirar.
-    Retorna: {"expira_em_dias": X, "precisa_renovar": True/False}
+    Executa a checagem de uma usina, sem tocar no banco.
+
+    Retorna:
+      {
+        "status": "ONLINE" | "OFFLINE" | "ERRO",
+        "placas": [{"codigo": ..., "status": ...}, ...] ou None,
+        "origem": "growatt_api" | "cookies" | "selenium" | "solarman_detalhado",
+      }
     """
-    import pickle
+    nome = cfg["nome"]
+    logger.info(f"-> Checando {nome} ...")
 
-    cookie_path = os.path.join(os.path.dirname(__file__), "..", cookie_file)
+    # CASO ESPECIAL: UFV CASA 4 com detalhe por placa
+    if nome == "UFV CASA 4":
+        if cfg.get("usa_api_http"):
+            try:
+                info = checar_solarman_http(cliente_solarman(cfg), nome)
+                return {
+                    "status": info["status_geral"],
+                    "placas": info["placas"],
+                    "origem": "solarman_api",
+                }
+            except ErroSolarman as e:
+                msg = f"[{nome}] API HTTP do Solarman falhou ({e}), usando navegador..."
+                logger.warning(msg)
 
-    if not os.path.exists(cookie_path):
+        info = checar_ufv_casa4_detalhado(cfg)
         return {
-            "expira_em_dias": 0,
-            "precisa_renovar": True,
-            "erro": "Arquivo não encontrado",
+            "status": info["status_geral"],
+            "placas": info["placas"],
+            "origem": "solarman_detalhado",
         }
 
-    try:
-        with open(cookie_path, "rb") as f:
-            cookies = pickle.load(f)
-
-        for cookie in cookies:
-            if "value" in cookie and cookie["value"].startswith("eyJ"):
-                try:
-                    payload_b64 = cookie["value"].split(".")[1]
-                    payload_b64 += "=" * (4 - len(payload_b64) % 4)
-                    payload_json = base64.b64decode(payload_b64).decode("utf-8")
-                    payload = json.loads(payload_json)
-
-                    if "exp" in payload:
-                        exp_timestamp = payload["exp"]
-                        exp_date = datetime.fromtimestamp(exp_timestamp)
-                        agora = datetime.now()
-                        dias_restantes = (exp_date - agora).days
-
-                        return {
-                            "expira_em_dias": dias_restantes,
-                            "expira_em": exp_date.strftime("%d/%m/%Y %H:%M"),
-                            "precisa_renovar": dias_restantes <= dias_aviso,
-                        }
-                except Exception:
-                    continue
-
+    # DEMAIS USINAS: fluxo antigo
+    if cfg.get("tipo") == "growatt_api":
         return {
-            "expira_em_dias": -1,
-            "precisa_renovar": False,
-            "erro": "Sem JWT nos cookies",
+            "status": checar_usina_growatt_api(cfg),
+            "placas": None,
+            "origem": "growatt_api",
         }
+    if cfg.get("tipo") == "isolarcloud":
+        cliente = cliente_isolarcloud(cfg)
+        if not cliente.configurado():
+            return {"status": checar_usina(cfg), "placas": None, "origem": "selenium"}
+        try:
+            status = cliente.status_usina(
+                ps_id=os.getenv(cfg.get("ps_id_env", ""), "") or None,
+                ps_nome=cfg.get("ps_nome"),
+            )
+            logger.info(f"[{nome}] (http) status iSolarCloud: {status}")
+            return {"status": status, "placas": None, "origem": "isolarcloud_api"}
+        except ErroISolarCloud as e:
+            msg = f"[{nome}] API HTTP do iSolarCloud falhou ({e}), usando navegador..."
+            logger.warning(msg)
+            return {"status": checar_usina(cfg), "placas": None, "origem": "selenium"}
+    if cfg.get("usa_cookies"):
+        return {"status": checar_usina_cookies(cfg), "placas": None, "origem": "cookies"}
+    return {"status": checar_usina(cfg), "placas": None, "origem": "selenium"}
 
-    except Exception as e:
-        return {"expira_em_dias": 0, "precisa_renovar": True, "erro": str(e)}
 
+# Linha de histórico por placa mesmo sem mudança a cada N minutos (0 = desligado)
+HEARTBEAT_HISTORICO_PLACA_MIN = int(os.getenv("HEARTBEAT_HISTORICO_PLACA_MIN", "0"))
 
-def main():
-    logger.info("=== Iniciando coleta de status das usinas ===")
 
-    cookies_verificados = set()
+def registrar_resultado(cfg: dict, resultado: dict, escritor: EscritorCiclo):
+    """
+    Enfileira no escritor o resultado de uma usina (status, placas,
+    histórico).
+    """
+    nome = cfg["nome"]
+    status_novo = resultado["status"]
+    placas = resultado.get("placas")
+    origem = resultado["origem"]
+
+    # status geral da usina (tabela usinas_status)
+    status_antigo = obter_status_anterior(nome)
+    escritor.status_usina(nome, status_novo)
+    logger.info(f"{nome}: {status_novo} (antes: {status_antigo})")
+
+    # Se mudou de status, registra no histórico
+    if status_novo != status_antigo:
+        escritor.historico(nome, status_novo, origem=origem, mensagem=None)
+
+    # salvar por placa (tabela placas_status)
+    heartbeat_s = HEARTBEAT_HISTORICO_PLACA_MIN * 60
+    for p in placas or []:
+        cod = p["codigo"]
+        st = p["status"]
+        st_antigo = CACHE_STATUS.status_placa(nome, cod)
+        escritor.status_placa(nome, cod, st)
+        logger.info(f"{nome} - {cod}: {st} (antes: {st_antigo})")
+
+        # histórico por placa só na mudança (ou heartbeat periódico, se ligado)
+        if st != st_antigo:
+            escritor.historico_placa(nome, cod, st, origem=origem)
+        elif heartbeat_s:
+            ultimo = CACHE_STATUS.ultimo_historico_placa(nome, cod)
+            if ultimo is None or time.time() - ultimo >= heartbeat_s:
+                escritor.historico_placa(nome, cod, st, origem=origem)
+
+
+def gravar_resultados(resultados: list):
+    """
+    Grava [(cfg, resultado), ...] em uma transação e só depois passa cada
+    leitura pelo motor de alertas (o tempo parado das recuperações vem do
+    histórico recém-gravado), na mesma ordem recebida. Se a gravação falhar
+    (banco fora, lock timeout), os alertas são avaliados mesmo assim e o
+    erro segue para o chamador.
+    """
+    escritor = EscritorCiclo(cache=CACHE_STATUS)
+    try:
+        for cfg, res in resultados:
+            registrar_resultado(cfg, res, escritor)
+        escritor.descarregar()
+    finally:
+        for cfg, res in resultados:
+            MOTOR_ALERTAS.avaliar(cfg, res["status"])
 
-    # 1) Avisos de expiração de cookies
-    for cfg in USINAS:
-        if cfg.get("usa_cookies") and cfg["cookie_file"] not in cookies_verificados:
-            cookies_verificados.add(cfg["cookie_file"])
-            info = verificar_expiracao_cookies(cfg["cookie_file"])
-
-            if info.get("precisa_renovar"):
-                dias = info.get("expira_em_dias", 0)
-                if dias > 0:
-                    msg = (
-                        f"AVISO: Cookies de {cfg['nome']} expiram em {dias} dias "
-                        f"({info.get('expira_em')}). Renove antes para evitar falhas!"
-                    )
-                else:
-                    msg = (
-                        f"URGENTE: Cookies de {cfg['nome']} "
-                        f"expiraram ou estão inválidos!"
-                    )
-                logger.warning(msg)
 
-    # 2) Coleta de status
-    def main():
-        logger.info("=== Iniciando coleta de status das usinas ===")
+LOCK_FILE = os.path.join(LOG_DIR, "coletar_status.lock")
 
-    cookies_verificados = set()
 
-    # 1) Avisos de expiração de cookies
-    for cfg in USINAS:
-        if cfg.get("usa_cookies") and cfg["cookie_file"] not in cookies_verificados:
-            cookies_verificados.add(cfg["cookie_file"])
-            info = verificar_expiracao_cookies(cfg["cookie_file"])
-
-            if info.get("precisa_renovar"):
-                dias = info.get("expira_em_dias", 0)
-                if dias > 0:
-                    msg = (
-                        f"AVISO: Cookies de {cfg['nome']} expiram em {dias} dias "
-                        f"({info.get('expira_em')}). Renove antes para evitar falhas!"
-                    )
-                else:
-                    msg = (
-                        f"URGENTE: Cookies de {cfg['nome']} "
-                        f"expiraram ou estão inválidos!"
-                    )
-                logger.warning(msg)
+def adquirir_trava():
+    """
+    Trava de processo para que cron e/ou daemon nunca se sobreponham.
+    Retorna o arquivo travado ou None se outra coleta já estiver rodando.
+    """
+    lock = open(LOCK_FILE, "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock.close()
+        return None
+    return lock
 
-    # 2) Coleta de status
-    for cfg in USINAS:
-        nome = cfg["nome"]
-        responsavel = cfg.get("responsavel", "")
-        logger.info(f"-> Checando {nome} ...")
-
-        # CASO ESPECIAL: UFV CASA 4 com detalhe por placa
-        if nome == "UFV CASA 4":
-            info = checar_ufv_casa4_detalhado(cfg)
-            status_geral = info["status_geral"]
-            placas = info["placas"]
-            origem = "solarman_detalhado"
-
-            # status geral da usina (tabela usinas_status)
-            status_antigo_geral = obter_status_anterior(nome)
-            salvar_status(nome, status_geral)
-            logger.info(f"{nome}: {status_geral} (antes: {status_antigo_geral})")
-
-            if status_geral != status_antigo_geral:
-                salvar_status_historico(
-                    nome_usina=nome,
-                    status=status_geral,
-                    origem=origem,
-                    mensagem=None,
-                )
 
-            # salvar por placa (tabela placas_status)
-            for p in placas:
-                cod = p["codigo"]
-                st = p["status"]
-                salvar_status_placa(nome, cod, st)
-                logger.info(f"{nome} - {cod}: {st}")
-
-                # histórico por placa (mantendo sua tabela de histórico atual)
-                salvar_status_historico(
-                    nome_usina=nome,
-                    status=st,
-                    origem=origem,
-                    mensagem=f"Placa {cod}",
-                )
+def liberar_trava(lock):
+    fcntl.flock(lock, fcntl.LOCK_UN)
+    lock.close()
 
-            # alerta geral (mantém regra atual)
-            if (
-                status_geral in ("OFFLINE", "ERRO")
-                and status_geral != status_antigo_geral
-            ):
-                msg = (
-                    f"[ALERTA] {nome} em estado crítico: "
-                    f"{status_antigo_geral} -> {status_geral}. Enviando WhatsApp..."
-                )
-                logger.warning(msg)
-                enviar_whatsapp_alerta(
-                    nome, status_geral, status_antigo_geral, responsavel
-                )
 
-            continue  # vai para a próxima usina
+def coletar_uma_vez():
+    """Um ciclo completo (modo cron)."""
+    logger.info("=== Iniciando coleta de status das usinas ===")
+    inicio = time.monotonic()
 
-        # DEMAIS USINAS: fluxo antigo
-        if cfg.get("tipo") == "growatt_api":
-            status_novo = checar_usina_growatt_api(cfg)
-            origem = "growatt_api"
-        elif cfg.get("usa_cookies"):
-            status_novo = checar_usina_cookies(cfg)
-            origem = "cookies"
-        else:
-            status_novo = checar_usina(cfg)
-            origem = "selenium"
+    # 1) Avisos de expiração de cookies (e reenvio de alertas pendentes)
+    ALERTAS.iniciar()
+    try:
+        avisar_expiracao_cookies()
 
-        status_antigo = obter_status_anterior(nome)
+        # 2) Coleta de status em paralelo
+        iniciar_supervisor()
+        motor = MotorColeta(coletar_usina)
+        try:
+            resultados = motor.executar_ciclo(USINAS)
+        finally:
+            motor.encerrar()
+            encerrar_supervisor()
+            POOL_DRIVERS.encerrar()
+
+        # 3) Gravação em lote e alertas na ordem fixa de USINAS
+        gravar_resultados(resultados)
+    finally:
+        # mesmo com erro na gravação, o que já está na fila é enviado
+        ALERTAS.encerrar()
+
+    msg = f"=== Coleta concluída em {time.monotonic() - inicio:.1f}s ==="
+    logger.info(msg)
+
+
+def executar_daemon():
+    """Processo contínuo com agendador interno (substitui o cron)."""
+    if not verificar_saude():
+        logger.error("[DAEMON] Banco indisponível na partida; tentando mesmo assim.")
+    iniciar_supervisor()
+    ALERTAS.iniciar()
+    motor = MotorColeta(coletar_usina)
+    agendador = AgendadorColeta(
+        motor,
+        USINAS,
+        lambda cfg, resultado: gravar_resultados([(cfg, resultado)]),
+        tarefas_periodicas=[(3600, avisar_expiracao_cookies)],
+    )
+    try:
+        agendador.executar()
+    finally:
+        motor.encerrar()
+        encerrar_supervisor()
+        POOL_DRIVERS.encerrar()
+        ALERTAS.encerrar()
 
-        salvar_status(nome, status_novo)
-        logger.info(f"{nome}: {status_novo} (antes: {status_antigo})")
 
-        # Se mudou de status, registra no histórico
-        if status_novo != status_antigo:
-            salvar_status_historico(
-                nome_usina=nome,
-                status=status_novo,
-                origem=origem,
-                mensagem=None,
-            )
+def main():
+    parser = argparse.ArgumentParser(description="Coleta de status das usinas solares")
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="roda continuamente com agendador interno em vez de um ciclo único",
+    )
+    args = parser.parse_args()
 
-        # Alerta só quando entra em crítico
-        if status_novo in ("OFFLINE", "ERRO") and status_novo != status_antigo:
-            msg = (
-                f"[ALERTA] {nome} em estado crítico: "
-                f"{status_antigo} -> {status_novo}. Enviando WhatsApp..."
-            )
-            logger.warning(msg)
-            enviar_whatsapp_alerta(nome, status_novo, status_antigo, responsavel)
+    lock = adquirir_trava()
+    if lock is None:
+        logger.warning("Coleta anterior ainda em execução, pulando este ciclo.")
+        return
+
+    try:
+        if args.daemon:
+            executar_daemon()
+        else:
+            coletar_uma_vez()
+    finally:
+        liberar_trava(lock)
 
 
 if __name__ == "__main__":
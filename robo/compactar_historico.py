@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Compacta usinas_status_historico removendo linhas repetidas consecutivas.
+
+Antes da gravação só-na-mudança, cada placa da UFV CASA 4 gerava uma linha
+por ciclo mesmo sem mudar de status. Este script mantém apenas a primeira
+linha de cada sequência de mesmo status por (usina, mensagem), que é o que
+obter_intervalos_parada precisa para achar as transições.
+
+Uso:
+    python compactar_historico.py                 # só mostra quanto removeria
+    python compactar_historico.py --executar      # apaga de fato
+    python compactar_historico.py --usina "UFV CASA 4" --ate 2026-01-01 --executar
+"""
+import os
+import sys
+import argparse
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from comum.db import get_db_connection  # noqa: E402
+
+TAMANHO_LOTE = 500
+
+
+def _apagar_lote(conn, ids: list):
+    """
+    Apaga pela chave primária: o EscritorCiclo grava o ciclo inteiro com o
+    mesmo changed_at, então (usina, mensagem, changed_at) pode casar também
+    com a linha que deveria ficar.
+    """
+    marcadores = ", ".join(["%s"] * len(ids))
+    cur = conn.cursor()
+    cur.execute(
+        f"DELETE FROM usinas_status_historico WHERE id IN ({marcadores})",
+        ids,
+    )
+    cur.close()
+
+
+def compactar(usina: str = None, ate: datetime = None, executar: bool = False) -> tuple:
+    """
+    Percorre o histórico por placa (mensagem preenchida) em ordem e apaga as
+    repetições. Devolve (linhas_lidas, linhas_removidas).
+    """
+    filtros = ["mensagem IS NOT NULL"]
+    params = []
+    if usina:
+        filtros.append("nome_usina = %s")
+        params.append(usina)
+    if ate:
+        filtros.append("changed_at < %s")
+        params.append(ate)
+
+    leitura = get_db_connection()
+    escrita = get_db_connection() if executar else None
+    cur = leitura.cursor(buffered=False)
+
+    lidas = removidas = 0
+    grupo_atual = None
+    status_atual = None
+    lote = []
+    try:
+        cur.execute(
+            f"""
+            SELECT id, nome_usina, mensagem, status
+            FROM usinas_status_historico
+            WHERE {' AND '.join(filtros)}
+            ORDER BY nome_usina, mensagem, changed_at, id
+            """,
+            params,
+        )
+        for id_linha, nome_usina, mensagem, status in cur:
+            lidas += 1
+            grupo = (nome_usina, mensagem)
+            if grupo == grupo_atual and status == status_atual:
+                removidas += 1
+                if executar:
+                    lote.append(id_linha)
+                    if len(lote) >= TAMANHO_LOTE:
+                        _apagar_lote(escrita, lote)
+                        lote = []
+                continue
+            grupo_atual = grupo
+            status_atual = status
+
+        if executar and lote:
+            _apagar_lote(escrita, lote)
+    finally:
+        cur.close()
+        leitura.close()
+        if escrita is not None:
+            escrita.close()
+
+    return lidas, removidas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--usina", help="compacta só esta usina (nome_usina)")
+    parser.add_argument(
+        "--ate",
+        type=datetime.fromisoformat,
+        help="compacta só linhas anteriores a esta data (AAAA-MM-DD)",
+    )
+    parser.add_argument(
+        "--executar",
+        action="store_true",
+        help="apaga de fato; sem esta flag apenas conta (dry-run)",
+    )
+    args = parser.parse_args()
+
+    lidas, removidas = compactar(args.usina, args.ate, args.executar)
+    acao = "Removidas" if args.executar else "Seriam removidas"
+    print(f"Linhas lidas: {lidas}")
+    print(f"{acao}: {removidas} ({lidas - removidas} mantidas)")
+
+
+if __name__ == "__main__":
+    main()
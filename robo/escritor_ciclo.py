@@ -0,0 +1,113 @@
+"""
+Gravação em lote de um ciclo de coleta.
+
+Acumula as linhas de usinas_status, placas_status e usinas_status_historico
+produzidas no ciclo e grava tudo com executemany (INSERT multi-linha) em
+uma única transação. O número de idas ao banco por ciclo fica fixo, não
+importa quantas placas a usina tenha.
+"""
+import time
+import logging
+from datetime import datetime
+
+from comum.db import get_db_connection
+from comum.marcador_ciclo import marcar_ciclo
+
+logger = logging.getLogger("robo_solar")
+
+SQL_STATUS = """
+    INSERT INTO usinas_status (nome_usina, status, updated_at)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        status = VALUES(status),
+        updated_at = VALUES(updated_at)
+"""
+
+SQL_PLACAS = """
+    INSERT INTO placas_status (nome_usina, codigo_placa, status, updated_at)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        status = VALUES(status),
+        updated_at = VALUES(updated_at)
+"""
+
+SQL_HISTORICO = """
+    INSERT INTO usinas_status_historico
+        (nome_usina, status, changed_at, origem, mensagem)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+
+class EscritorCiclo:
+    def __init__(self, cache=None):
+        """cache: CacheStatus opcional, atualizado após cada commit."""
+        self.agora = datetime.now()
+        self.cache = cache
+        self._status: list[tuple] = []
+        self._placas: list[tuple] = []
+        self._historico: list[tuple] = []
+        self._historico_placas: list[tuple] = []
+
+    def status_usina(self, nome_usina: str, status: str):
+        self._status.append((nome_usina, status, self.agora))
+
+    def status_placa(self, nome_usina: str, codigo_placa: str, status: str):
+        self._placas.append((nome_usina, codigo_placa, status, self.agora))
+
+    def historico(self, nome_usina: str, status: str, origem: str = None, mensagem: str = None):
+        self._historico.append((nome_usina, status, self.agora, origem, mensagem))
+
+    def historico_placa(self, nome_usina: str, codigo_placa: str, status: str, origem: str = None):
+        """Histórico por placa (mensagem 'Placa <codigo>', lida pelo paradas_app)."""
+        self.historico(nome_usina, status, origem=origem, mensagem=f"Placa {codigo_placa}")
+        self._historico_placas.append((nome_usina, codigo_placa))
+
+    def pendentes(self) -> int:
+        return len(self._status) + len(self._placas) + len(self._historico)
+
+    def descarregar(self):
+        """Grava tudo em uma transação; em erro faz rollback e mantém o buffer."""
+        if not self.pendentes():
+            return
+
+        conn = get_db_connection()
+        cur = conn.cursor()
+        try:
+            conn.start_transaction()
+            for sql, linhas in (
+                (SQL_STATUS, self._status),
+                (SQL_PLACAS, self._placas),
+                (SQL_HISTORICO, self._historico),
+            ):
+                if linhas:
+                    cur.executemany(sql, linhas)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+
+        msg = (
+            f"[DB] Ciclo gravado: {len(self._status)} usinas, "
+            f"{len(self._placas)} placas, {len(self._historico)} históricos"
+        )
+        logger.info(msg)
+        # avisa a dashboard que há dados novos
+        marcar_ciclo()
+
+        if self.cache is not None:
+            for nome, status, _ in self._status:
+                self.cache.atualizar_usina(nome, status)
+            for nome, codigo, status, _ in self._placas:
+                self.cache.atualizar_placa(nome, codigo, status)
+            gravado_em = time.time()
+            for nome, codigo in self._historico_placas:
+                self.cache.marcar_historico_placa(nome, codigo, gravado_em)
+            self.cache.salvar_snapshot()
+
+        self._status.clear()
+        self._placas.clear()
+        self._historico.clear()
+        self._historico_placas.clear()
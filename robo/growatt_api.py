@@ -0,0 +1,154 @@
+"""
+Cliente da OpenAPI Growatt com sessão HTTP compartilhada.
+
+- Keep-alive: uma requests.Session com pool de conexões para todas as usinas.
+- Balde de tokens por token de API, para não disparar error_frequently_access.
+- Retentativas com backoff exponencial + jitter em 5xx, falha de rede e
+  rate limit, antes de desistir (e o chamador cair no Selenium).
+- plant/list em lote: um token que cobre várias usinas busca a lista uma
+  vez e as demais usinas do mesmo token reaproveitam por alguns segundos.
+"""
+import os
+import time
+import random
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("robo_solar")
+
+GROWATT_API_BASE = "https://openapi.growatt.com/v1"
+
+
+class ErroGrowatt(Exception):
+    """Falha definitiva da API. `recuperavel` indica 5xx/rate limit/rede."""
+
+    def __init__(self, mensagem: str, recuperavel: bool = False):
+        super().__init__(mensagem)
+        self.recuperavel = recuperavel
+
+
+class BaldeTokens:
+    def __init__(self, por_minuto: float, capacidade: int):
+        self.taxa = por_minuto / 60.0
+        self.capacidade = capacidade
+        self.disponivel = float(capacidade)
+        self.atualizado = time.monotonic()
+        self._lock = threading.Lock()
+
+    def aguardar(self):
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self.disponivel = min(
+                    self.capacidade,
+                    self.disponivel + (agora - self.atualizado) * self.taxa,
+                )
+                self.atualizado = agora
+                if self.disponivel >= 1:
+                    self.disponivel -= 1
+                    return
+                espera = (1 - self.disponivel) / self.taxa
+            time.sleep(espera)
+
+
+class ClienteGrowatt:
+    def __init__(self):
+        self.tentativas = int(os.getenv("GROWATT_TENTATIVAS", "3"))
+        self.backoff_base = float(os.getenv("GROWATT_BACKOFF_S", "2"))
+        self.req_por_minuto = float(os.getenv("GROWATT_REQ_POR_MIN", "10"))
+        self.capacidade = int(os.getenv("GROWATT_RAJADA", "3"))
+        self.ttl_lista = float(os.getenv("GROWATT_TTL_LISTA_S", "60"))
+
+        self.sessao = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self.sessao.mount("https://", adaptador)
+        self.sessao.mount("http://", adaptador)
+
+        self._baldes: dict[str, BaldeTokens] = {}
+        self._listas: dict[str, tuple] = {}  # token -> (obtida_em, {plant_id: dados})
+        self._locks_lista: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _balde(self, token: str) -> BaldeTokens:
+        with self._lock:
+            if token not in self._baldes:
+                self._baldes[token] = BaldeTokens(self.req_por_minuto, self.capacidade)
+            return self._baldes[token]
+
+    def _lock_lista(self, token: str) -> threading.Lock:
+        with self._lock:
+            return self._locks_lista.setdefault(token, threading.Lock())
+
+    def _espera_backoff(self, tentativa: int) -> float:
+        base = self.backoff_base * (2 ** tentativa)
+        return base + random.uniform(0, base)
+
+    def _get(self, token: str, caminho: str, params: dict) -> dict:
+        """GET com rate limit local e retentativas; devolve payload['data']."""
+        url = f"{GROWATT_API_BASE}/{caminho}"
+        ultimo_erro = None
+
+        for tentativa in range(self.tentativas):
+            if tentativa:
+                espera = self._espera_backoff(tentativa - 1)
+                msg = f"[GROWATT] {caminho}: nova tentativa em {espera:.1f}s ({ultimo_erro})"
+                logger.warning(msg)
+                time.sleep(espera)
+
+            self._balde(token).aguardar()
+            try:
+                resp = self.sessao.get(
+                    url, headers={"token": token}, params=params, timeout=15
+                )
+            except requests.RequestException as e:
+                ultimo_erro = f"rede: {e}"
+                continue
+
+            if 500 <= resp.status_code < 600:
+                ultimo_erro = f"HTTP {resp.status_code}"
+                continue
+            if resp.status_code >= 400:
+                raise ErroGrowatt(f"HTTP {resp.status_code} em {caminho}")
+
+            payload = resp.json()
+            if payload.get("error_code") == 0:
+                return payload.get("data", {}) or {}
+
+            err = payload.get("error_msg")
+            if err == "error_frequently_access":
+                ultimo_erro = "rate limit (error_frequently_access)"
+                continue
+            raise ErroGrowatt(f"ERRO API em {caminho}: {err}")
+
+        raise ErroGrowatt(
+            f"{caminho} falhou após {self.tentativas} tentativas: {ultimo_erro}",
+            recuperavel=True,
+        )
+
+    def listar_usinas(self, token: str) -> dict:
+        """plant/list do token, com cache curto compartilhado entre threads."""
+        with self._lock_lista(token):
+            em_cache = self._listas.get(token)
+            if em_cache and time.monotonic() - em_cache[0] < self.ttl_lista:
+                return em_cache[1]
+
+            data = self._get(token, "plant/list", {"page": 1, "perpage": 100})
+            usinas = {
+                str(p.get("plant_id")): p for p in data.get("plants", []) or []
+            }
+            self._listas[token] = (time.monotonic(), usinas)
+            return usinas
+
+    def resumo_usina(self, token: str, plant_id) -> dict:
+        """Entrada da usina no plant/list, ou None se a lista falhar/omitir."""
+        try:
+            return self.listar_usinas(token).get(str(plant_id))
+        except ErroGrowatt as e:
+            logger.warning(f"[GROWATT] plant/list indisponível, seguindo por usina: {e}")
+            return None
+
+    def dados_usina(self, token: str, plant_id) -> dict:
+        return self._get(token, "plant/data", {"plant_id": plant_id})
@@ -0,0 +1,164 @@
+"""
+Coletor HTTP do iSolarCloud (Sungrow), caminho rápido antes do Selenium.
+
+Faz login pela API JSON do gateway (a mesma que a SPA Vue usa), guarda o
+token em memória e em cache/isolarcloud_token.json até expirar, e lê o
+status da usina em getPsList. Qualquer falha levanta ErroISolarCloud e o
+chamador cai no fluxo Selenium de sempre.
+"""
+import os
+import json
+import time
+import logging
+import threading
+
+import requests
+
+logger = logging.getLogger("robo_solar")
+
+ISOLARCLOUD_BASE = "https://gateway.isolarcloud.com.hk"
+
+TOKEN_CACHE_PADRAO = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "cache", "isolarcloud_token.json"
+)
+
+# result_code de token inválido/expirado
+CODIGOS_TOKEN_INVALIDO = ("E00003", "er_token_login_invalid")
+
+
+class ErroISolarCloud(Exception):
+    pass
+
+
+def interpretar_usina(usina: dict) -> str:
+    """
+    Mesma regra do Selenium (texto 'Normal' = ONLINE): usina desconectada
+    (ps_status 0) ou com falha/alarme (ps_fault_status 1/2) vira OFFLINE.
+    """
+    if str(usina.get("ps_status", "1")) == "0":
+        return "OFFLINE"
+    if str(usina.get("ps_fault_status", "")) in ("1", "2"):
+        return "OFFLINE"
+    return "ONLINE"
+
+
+class ClienteISolarCloud:
+    def __init__(self, usuario: str, senha: str, caminho_token: str = None):
+        self.usuario = usuario
+        self.senha = senha
+        self.base = os.getenv("ISOLARCLOUD_BASE", ISOLARCLOUD_BASE)
+        self.appkey = os.getenv("ISOLARCLOUD_APPKEY", "")
+        self.access_key = os.getenv("ISOLARCLOUD_ACCESS_KEY", "")
+        self.ttl_token = int(os.getenv("ISOLARCLOUD_TOKEN_TTL_S", "21600"))
+        self.caminho_token = caminho_token or TOKEN_CACHE_PADRAO
+
+        self.sessao = requests.Session()
+        self.sessao.headers.update(
+            {
+                "Content-Type": "application/json",
+                "x-access-key": self.access_key,
+                "sys_code": "901",
+            }
+        )
+        self._token = None
+        self._token_obtido_em = 0.0
+        self._lock = threading.Lock()
+        self._ler_token_cache()
+
+    def _ler_token_cache(self):
+        try:
+            with open(self.caminho_token, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            return
+        if dados.get("usuario") == self.usuario:
+            self._token = dados.get("token")
+            self._token_obtido_em = float(dados.get("obtido_em", 0))
+
+    def _gravar_token_cache(self):
+        try:
+            os.makedirs(os.path.dirname(self.caminho_token), exist_ok=True)
+            # criado já com 0600: o token nunca fica legível por outros usuários
+            flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+            fd = os.open(self.caminho_token, flags, 0o600)
+            # arquivo antigo mantém o modo de antes; corrige antes de escrever
+            os.fchmod(fd, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "usuario": self.usuario,
+                        "token": self._token,
+                        "obtido_em": self._token_obtido_em,
+                    },
+                    f,
+                )
+        except OSError as e:
+            logger.warning(f"[ISOLARCLOUD] Não foi possível salvar token: {e}")
+
+    def configurado(self) -> bool:
+        """Sem appkey/access key o gateway recusa o login: nem vale tentar."""
+        return bool(self.appkey and self.access_key)
+
+    def _token_valido(self) -> bool:
+        return bool(self._token) and time.time() - self._token_obtido_em < self.ttl_token
+
+    def _post(self, caminho: str, corpo: dict) -> dict:
+        corpo = {"appkey": self.appkey, "lang": "_en_US", **corpo}
+        try:
+            resp = self.sessao.post(f"{self.base}{caminho}", json=corpo, timeout=15)
+            resp.raise_for_status()
+            return resp.json()
+        except (requests.RequestException, ValueError) as e:
+            raise ErroISolarCloud(f"{caminho}: {e}") from e
+
+    def _login(self):
+        if not self.configurado():
+            raise ErroISolarCloud("ISOLARCLOUD_APPKEY/ISOLARCLOUD_ACCESS_KEY ausentes")
+        payload = self._post(
+            "/v1/userService/login",
+            {
+                "sys_code": "900",
+                "user_account": self.usuario,
+                "user_password": self.senha,
+            },
+        )
+        token = (payload.get("result_data") or {}).get("token")
+        if str(payload.get("result_code")) != "1" or not token:
+            raise ErroISolarCloud(f"login recusado: {payload.get('result_msg')}")
+        self._token = token
+        self._token_obtido_em = time.time()
+        self._gravar_token_cache()
+        logger.info("[ISOLARCLOUD] Login HTTP realizado, token em cache.")
+
+    def _chamar(self, caminho: str, corpo: dict) -> dict:
+        """Chamada autenticada; refaz o login uma vez se o token cair."""
+        with self._lock:
+            if not self._token_valido():
+                self._login()
+            for tentativa in range(2):
+                payload = self._post(caminho, {"token": self._token, **corpo})
+                codigo = str(payload.get("result_code"))
+                if codigo == "1":
+                    return payload.get("result_data") or {}
+                if codigo in CODIGOS_TOKEN_INVALIDO and tentativa == 0:
+                    self._login()
+                    continue
+                raise ErroISolarCloud(f"{caminho}: {codigo} {payload.get('result_msg')}")
+        raise ErroISolarCloud(f"{caminho}: token recusado após novo login")
+
+    def listar_usinas(self) -> list:
+        data = self._chamar(
+            "/v1/powerStationService/getPsList", {"curPage": 1, "size": 100}
+        )
+        return data.get("pageList") or []
+
+    def status_usina(self, ps_id: str = None, ps_nome: str = None) -> str:
+        usinas = self.listar_usinas()
+        for usina in usinas:
+            if ps_id and str(usina.get("ps_id")) == str(ps_id):
+                return interpretar_usina(usina)
+            if ps_nome and usina.get("ps_name") == ps_nome:
+                return interpretar_usina(usina)
+        if not ps_id and not ps_nome and len(usinas) == 1:
+            return interpretar_usina(usinas[0])
+        raise ErroISolarCloud("usina não encontrada em getPsList")
@@ -0,0 +1,296 @@
+"""
+Máquina de estados dos alertas por usina.
+
+Cada coleta passa por avaliar(cfg, status). O motor decide o que avisar:
+  - alerta só depois de ALERTA_CONFIRMACOES leituras críticas seguidas
+    (histerese), e recuperação depois de ALERTA_CONFIRMACOES_RECUPERACAO
+    leituras ONLINE seguidas, com o tempo parado (até a primeira leitura
+    ONLINE, sem contar as confirmações) tirado de usinas_status_historico;
+  - usina que alterna crítico/ONLINE ALERTA_OSCILACAO_LIMITE vezes dentro
+    de ALERTA_OSCILACAO_JANELA_S entra em "oscilando": um aviso só, e os
+    demais ficam suprimidos até ela estabilizar;
+  - alerta sem recuperação após ALERTA_ESCALONAR_APOS_S é enviado também
+    para o telefone do campo "responsavel".
+O estado fica em cache/alertas_estado.json para sobreviver ao cron.
+"""
+import os
+import re
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+
+from comum.db import consultar
+
+logger = logging.getLogger("robo_solar")
+
+ESTADO_PADRAO = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "cache", "alertas_estado.json"
+)
+
+CRITICOS = ("OFFLINE", "ERRO")
+
+SQL_HISTORICO_RECENTE = """
+    SELECT status, changed_at
+    FROM usinas_status_historico
+    WHERE nome_usina = %s AND mensagem IS NULL
+    ORDER BY changed_at DESC
+    LIMIT 50
+"""
+
+
+def numero_responsavel(responsavel: str):
+    """'Edson - 85988066711' -> '5585988066711' (None se não houver telefone)."""
+    digitos = re.sub(r"\D", "", responsavel or "")
+    if len(digitos) in (10, 11):
+        return f"55{digitos}"
+    if len(digitos) in (12, 13) and digitos.startswith("55"):
+        return digitos
+    return None
+
+
+def intervalo_parada(nome_usina: str):
+    """
+    (inicio, fim) da última sequência crítica no histórico da usina: fim é
+    o changed_at da linha ONLINE que a encerrou (None se não houver).
+    inicio é None se não houver sequência crítica.
+    """
+    linhas = consultar(SQL_HISTORICO_RECENTE, (nome_usina,))
+    inicio = fim = None
+    for status, changed_at in linhas:
+        if status in CRITICOS:
+            inicio = changed_at
+        elif inicio is not None:
+            break
+        else:
+            # linhas vêm da mais nova para a mais antiga: fica a ONLINE
+            # imediatamente posterior à sequência crítica
+            fim = changed_at
+    return inicio, fim
+
+
+def formatar_duracao(segundos: float) -> str:
+    minutos = int(segundos // 60)
+    horas, minutos = divmod(minutos, 60)
+    dias, horas = divmod(horas, 24)
+    if dias:
+        return f"{dias}d {horas}h{minutos:02d}min"
+    if horas:
+        return f"{horas}h{minutos:02d}min"
+    return f"{minutos}min"
+
+
+class MotorAlertas:
+    def __init__(self, despachante, caminho_estado: str = None):
+        self.despachante = despachante
+        self.caminho_estado = caminho_estado or os.getenv("ALERTAS_ESTADO", ESTADO_PADRAO)
+        self.confirmacoes = int(os.getenv("ALERTA_CONFIRMACOES", "2"))
+        self.confirmacoes_recuperacao = int(
+            os.getenv("ALERTA_CONFIRMACOES_RECUPERACAO", "2")
+        )
+        self.janela_oscilacao_s = int(os.getenv("ALERTA_OSCILACAO_JANELA_S", "3600"))
+        self.limite_oscilacao = int(os.getenv("ALERTA_OSCILACAO_LIMITE", "4"))
+        self.escalonar_apos_s = int(os.getenv("ALERTA_ESCALONAR_APOS_S", "1800"))
+        self._estados: dict[str, dict] = {}
+        self._carregado = False
+        self._lock = threading.Lock()
+
+    # ---------- persistência ----------
+
+    def _carregar(self):
+        if self._carregado:
+            return
+        self._carregado = True
+        try:
+            with open(self.caminho_estado, "r", encoding="utf-8") as f:
+                self._estados = json.load(f)
+        except (OSError, ValueError):
+            self._estados = {}
+
+    def _salvar(self):
+        try:
+            os.makedirs(os.path.dirname(self.caminho_estado), exist_ok=True)
+            tmp = f"{self.caminho_estado}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._estados, f)
+            os.replace(tmp, self.caminho_estado)
+        except OSError as e:
+            logger.warning(f"[ALERTAS] Não foi possível gravar o estado: {e}")
+
+    def _estado(self, nome: str) -> dict:
+        return self._estados.setdefault(
+            nome,
+            {
+                "estado": "normal",
+                "ultimo_status": None,
+                "criticos_seguidos": 0,
+                "online_seguidos": 0,
+                "online_desde": None,
+                "transicoes": [],
+                "inicio_critico": None,
+                "status_alerta": None,
+                "alertado_em": None,
+                "escalonado": False,
+            },
+        )
+
+    # ---------- mensagens ----------
+
+    def _enviar(
+        self, chave: str, titulo: str, cfg: dict, linhas: list, resumo: str, numero=None
+    ):
+        responsavel = cfg.get("responsavel", "")
+        texto = (
+            f"{titulo}\n\n"
+            f"Usina: {cfg['nome']}\n"
+            + "".join(f"{linha}\n" for linha in linhas)
+            + f"Responsável técnico: {responsavel or 'não cadastrado'}\n"
+            f"Data/hora: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
+        )
+        self.despachante.enfileirar(chave, texto, resumo=resumo, numero=numero)
+
+    def _tempo_parado(self, nome: str, e: dict, agora: float) -> str:
+        """Do início da parada até a primeira leitura ONLINE (não até agora)."""
+        inicio = fim = None
+        try:
+            inicio, fim = intervalo_parada(nome)
+        except Exception as erro:
+            logger.warning(f"[{nome}] Histórico indisponível para o tempo parado: {erro}")
+        if inicio is not None:
+            fim = fim or datetime.now()
+            return formatar_duracao((fim - inicio).total_seconds())
+        if e["inicio_critico"]:
+            online_desde = e.get("online_desde") or agora
+            return formatar_duracao(online_desde - e["inicio_critico"])
+        return "desconhecido"
+
+    def _alertar(self, cfg: dict, e: dict, status: str, agora: float):
+        nome = cfg["nome"]
+        e.update(estado="alerta", status_alerta=status, alertado_em=agora, escalonado=False)
+        msg = f"[ALERTA] {nome} em estado crítico ({status}). Enfileirando WhatsApp..."
+        logger.warning(msg)
+        # chave por incidente: outra queda logo após uma recuperação não pode
+        # cair no dedup do despachante (ALERTAS_DEDUP_S)
+        self._enviar(
+            f"{nome}:{status}:{int(agora)}",
+            "ALERTA MONITORAMENTO SOLAR",
+            cfg,
+            [f"Status atual: {status}"],
+            f"{nome}: {status}",
+        )
+
+    def _recuperar(self, cfg: dict, e: dict, titulo: str, agora: float):
+        nome = cfg["nome"]
+        parado = self._tempo_parado(nome, e, agora)
+        logger.info(f"[ALERTA] {nome} recuperada após {parado}.")
+        linhas = ["Status atual: ONLINE", f"Tempo parado: {parado}"]
+        chave = f"{nome}:recuperacao:{int(e['alertado_em'] or 0)}"
+        resumo = f"{nome}: ONLINE após {parado}"
+        self._enviar(chave, titulo, cfg, linhas, resumo)
+        numero = numero_responsavel(cfg.get("responsavel", ""))
+        if e["escalonado"] and numero:
+            # quem recebeu o escalonamento também fica sabendo da volta
+            self._enviar(f"{chave}:responsavel", titulo, cfg, linhas, resumo, numero)
+        e.update(estado="normal", status_alerta=None, alertado_em=None, escalonado=False)
+        e["inicio_critico"] = None
+
+    def _escalonar(self, cfg: dict, e: dict, agora: float):
+        nome = cfg["nome"]
+        e["escalonado"] = True
+        numero = numero_responsavel(cfg.get("responsavel", ""))
+        if not numero:
+            logger.warning(f"[ALERTA] {nome} sem telefone de responsável para escalonar.")
+            return
+        parado = formatar_duracao(agora - (e["inicio_critico"] or e["alertado_em"]))
+        logger.warning(f"[ALERTA] {nome} crítica há {parado}, escalonando ao responsável.")
+        self._enviar(
+            f"{nome}:escalonamento:{int(e['alertado_em'])}",
+            "ALERTA MONITORAMENTO SOLAR - SEM RECUPERAÇÃO",
+            cfg,
+            [f"Status atual: {e['status_alerta']}", f"Parada há: {parado}"],
+            f"{nome}: {e['status_alerta']} há {parado}",
+            numero,
+        )
+
+    # ---------- máquina de estados ----------
+
+    def avaliar(self, cfg: dict, status: str):
+        with self._lock:
+            self._carregar()
+            self._avaliar(cfg, status, time.time())
+            self._salvar()
+
+    def _avaliar(self, cfg: dict, status: str, agora: float):
+        nome = cfg["nome"]
+        e = self._estado(nome)
+        critico = status in CRITICOS
+
+        anterior = e["ultimo_status"]
+        if anterior is not None and (anterior in CRITICOS) != critico:
+            e["transicoes"].append(agora)
+        e["transicoes"] = [t for t in e["transicoes"] if agora - t <= self.janela_oscilacao_s]
+        e["ultimo_status"] = status
+
+        if critico:
+            e["criticos_seguidos"] += 1
+            e["online_seguidos"] = 0
+            if e["inicio_critico"] is None:
+                e["inicio_critico"] = agora
+        else:
+            if e["online_seguidos"] == 0:
+                e["online_desde"] = agora
+            e["online_seguidos"] += 1
+            e["criticos_seguidos"] = 0
+            if e["estado"] == "normal":
+                e["inicio_critico"] = None
+
+        oscilando = len(e["transicoes"]) >= self.limite_oscilacao
+        if e["estado"] == "oscilando":
+            if oscilando:
+                return
+            logger.info(f"[ALERTA] {nome} parou de oscilar ({status}).")
+            if not critico:
+                self._recuperar(cfg, e, "USINA ESTÁVEL NOVAMENTE", agora)
+                return
+            e["estado"] = "normal"
+        elif oscilando:
+            e["estado"] = "oscilando"
+            if e["alertado_em"] is None:
+                e["alertado_em"] = agora
+            msg = (
+                f"[ALERTA] {nome} oscilando ({len(e['transicoes'])} trocas em "
+                f"{self.janela_oscilacao_s // 60}min), suprimindo alertas."
+            )
+            logger.warning(msg)
+            # por incidente, como em _alertar: nova oscilação logo depois de
+            # estabilizar não pode cair no dedup do despachante
+            self._enviar(
+                f"{nome}:oscilando:{int(agora)}",
+                "ALERTA MONITORAMENTO SOLAR - USINA OSCILANDO",
+                cfg,
+                [
+                    f"Status atual: {status}",
+                    f"Trocas de status na última hora: {len(e['transicoes'])}",
+                    "Novos avisos suspensos até estabilizar.",
+                ],
+                f"{nome}: oscilando ({len(e['transicoes'])} trocas)",
+            )
+            return
+
+        if e["estado"] == "normal":
+            if critico and e["criticos_seguidos"] >= self.confirmacoes:
+                self._alertar(cfg, e, status, agora)
+            return
+
+        # estado == "alerta"
+        if critico:
+            e["status_alerta"] = status
+            if (
+                self.escalonar_apos_s
+                and not e["escalonado"]
+                and agora - e["alertado_em"] >= self.escalonar_apos_s
+            ):
+                self._escalonar(cfg, e, agora)
+        elif e["online_seguidos"] >= self.confirmacoes_recuperacao:
+            self._recuperar(cfg, e, "USINA RECUPERADA", agora)
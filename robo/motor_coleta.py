@@ -0,0 +1,79 @@
+"""
+Motor de coleta concorrente das usinas.
+
+Executa as checagens em paralelo, com limites separados de workers para
+usinas atendidas por API (HTTP puro) e por navegador (Selenium). Os
+resultados são devolvidos sempre na ordem de USINAS, para que gravação e
+alertas continuem determinísticos.
+"""
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from supervisor_navegador import TempoEsgotado
+
+logger = logging.getLogger("robo_solar")
+
+TIPOS_API = ("growatt_api", "isolarcloud")
+
+
+def tipo_execucao(cfg: dict) -> str:
+    """Classifica a usina em 'api' ou 'navegador' (pelo caminho principal)."""
+    if cfg.get("tipo") in TIPOS_API or cfg.get("usa_api_http"):
+        return "api"
+    return "navegador"
+
+
+class MotorColeta:
+    """
+    Dois pools de threads: um para usinas via API e outro para usinas via
+    navegador. O pool de navegador costuma ser menor, pois cada worker
+    segura um Chrome inteiro em memória.
+    """
+
+    def __init__(self, coletar, max_workers_api: int = None, max_workers_navegador: int = None):
+        self.coletar = coletar
+        self.max_workers_api = max_workers_api or int(
+            os.getenv("COLETA_WORKERS_API", "8")
+        )
+        # deve casar com o tamanho do PoolDrivers (mesma variável)
+        self.max_workers_navegador = max_workers_navegador or int(
+            os.getenv("COLETA_WORKERS_NAVEGADOR", "2")
+        )
+        self._pools = {
+            "api": ThreadPoolExecutor(
+                max_workers=self.max_workers_api, thread_name_prefix="coleta-api"
+            ),
+            "navegador": ThreadPoolExecutor(
+                max_workers=self.max_workers_navegador,
+                thread_name_prefix="coleta-nav",
+            ),
+        }
+
+    def _executar(self, cfg: dict) -> dict:
+        nome = cfg["nome"]
+        try:
+            return self.coletar(cfg)
+        except TempoEsgotado as e:
+            logger.error(f"[{nome}] Coleta abortada por prazo: {e}")
+            return {"status": "ERRO", "placas": None, "origem": "timeout"}
+        except Exception as e:
+            msg = f"[{nome}] ERRO não tratado na coleta: {type(e).__name__}: {e}"
+            logger.error(msg)
+            return {"status": "ERRO", "placas": None, "origem": "erro_coleta"}
+
+    def submeter(self, cfg: dict):
+        """Agenda a coleta de uma usina e devolve o Future correspondente."""
+        return self._pools[tipo_execucao(cfg)].submit(self._executar, cfg)
+
+    def executar_ciclo(self, usinas: list) -> list:
+        """
+        Coleta todas as usinas em paralelo e devolve [(cfg, resultado), ...]
+        na mesma ordem da lista recebida.
+        """
+        futures = [(cfg, self.submeter(cfg)) for cfg in usinas]
+        return [(cfg, fut.result()) for cfg, fut in futures]
+
+    def encerrar(self, aguardar: bool = True):
+        for pool in self._pools.values():
+            pool.shutdown(wait=aguardar, cancel_futures=not aguardar)
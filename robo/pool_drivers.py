@@ -0,0 +1,236 @@
+"""
+Pool de sessões Chrome (Selenium) reaproveitadas entre checagens.
+
+Abrir um Chrome headless é o maior custo fixo do ciclo, então as sessões
+ficam aquecidas e são emprestadas às funções de coleta. Cada sessão tem
+porta de depuração e perfil próprios, passa por um health check antes de
+cada empréstimo e é reciclada após N usos ou ao estourar o limite de
+memória.
+"""
+import os
+import time
+import shutil
+import socket
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+
+logger = logging.getLogger("robo_solar")
+
+# prefixo do perfil temporário; também identifica Chromes órfãos do robô
+PREFIXO_PERFIL = "robo_solar_chrome_"
+
+_caminho_chromedriver = None
+_lock_chromedriver = threading.Lock()
+
+
+def obter_chromedriver() -> str:
+    """Resolve o chromedriver uma única vez por processo."""
+    global _caminho_chromedriver
+    with _lock_chromedriver:
+        if _caminho_chromedriver is None:
+            _caminho_chromedriver = ChromeDriverManager().install()
+        return _caminho_chromedriver
+
+
+def porta_livre() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def criar_driver(porta: int, perfil_dir: str):
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument(f"--remote-debugging-port={porta}")
+    options.add_argument(f"--user-data-dir={perfil_dir}")
+
+    options.binary_location = "/usr/bin/google-chrome"
+
+    service = Service(obter_chromedriver())
+    driver = webdriver.Chrome(service=service, options=options)
+    return driver
+
+
+def filhos_por_pai() -> dict:
+    filhos = {}
+    for entrada in os.listdir("/proc"):
+        if not entrada.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entrada}/stat", "r") as f:
+                campos = f.read().rsplit(")", 1)[1].split()
+            ppid = int(campos[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        filhos.setdefault(ppid, []).append(int(entrada))
+    return filhos
+
+
+def memoria_arvore_mb(pid: int) -> float:
+    """Soma o RSS (MB) de um processo e de todos os seus descendentes."""
+    try:
+        filhos = filhos_por_pai()
+    except OSError:
+        return 0.0
+
+    total_kb = 0
+    pendentes = [pid]
+    while pendentes:
+        atual = pendentes.pop()
+        pendentes.extend(filhos.get(atual, []))
+        try:
+            with open(f"/proc/{atual}/status", "r") as f:
+                for linha in f:
+                    if linha.startswith("VmRSS:"):
+                        total_kb += int(linha.split()[1])
+                        break
+        except (OSError, ValueError):
+            continue
+    return total_kb / 1024.0
+
+
+class SessaoNavegador:
+    def __init__(self, driver, porta: int, perfil_dir: str):
+        self.driver = driver
+        self.porta = porta
+        self.perfil_dir = perfil_dir
+        self.usos = 0
+        self.criada_em = time.monotonic()
+
+    def pid(self):
+        try:
+            return self.driver.service.process.pid
+        except AttributeError:
+            return None
+
+    def fechar(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.warning(f"[POOL] Erro ao fechar sessão na porta {self.porta}: {e}")
+        shutil.rmtree(self.perfil_dir, ignore_errors=True)
+
+
+class PoolDrivers:
+    """
+    Uso:
+        with POOL_DRIVERS.emprestar() as driver:
+            driver.get(...)
+    """
+
+    def __init__(self, tamanho: int = None, max_usos: int = None, max_memoria_mb: int = None):
+        self.tamanho = tamanho or int(os.getenv("COLETA_WORKERS_NAVEGADOR", "2"))
+        self.max_usos = max_usos or int(os.getenv("POOL_DRIVERS_MAX_USOS", "25"))
+        self.max_memoria_mb = max_memoria_mb or int(
+            os.getenv("POOL_DRIVERS_MAX_MEMORIA_MB", "900")
+        )
+        self._vagas = threading.BoundedSemaphore(self.tamanho)
+        self._ociosas: list[SessaoNavegador] = []
+        self._lock = threading.Lock()
+        self._encerrado = False
+
+    def _nova_sessao(self) -> SessaoNavegador:
+        porta = porta_livre()
+        perfil_dir = tempfile.mkdtemp(prefix=PREFIXO_PERFIL)
+        inicio = time.monotonic()
+        try:
+            driver = criar_driver(porta, perfil_dir)
+        except Exception:
+            shutil.rmtree(perfil_dir, ignore_errors=True)
+            raise
+        msg = (
+            f"[POOL] Nova sessão Chrome na porta {porta} "
+            f"({time.monotonic() - inicio:.1f}s)"
+        )
+        logger.info(msg)
+        return SessaoNavegador(driver, porta, perfil_dir)
+
+    def _saudavel(self, sessao: SessaoNavegador) -> bool:
+        try:
+            return sessao.driver.execute_script("return 1;") == 1
+        except Exception:
+            return False
+
+    def _precisa_reciclar(self, sessao: SessaoNavegador) -> str:
+        if sessao.usos >= self.max_usos:
+            return f"{sessao.usos} usos"
+        pid = sessao.pid()
+        if pid:
+            memoria = memoria_arvore_mb(pid)
+            if memoria > self.max_memoria_mb:
+                return f"{memoria:.0f} MB de memória"
+        return ""
+
+    def _limpar(self, sessao: SessaoNavegador):
+        """Apaga estado da usina anterior sem perder o cache HTTP do perfil."""
+        driver = sessao.driver
+        try:
+            driver.execute_script(
+                "try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}"
+            )
+        except Exception:
+            pass
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.get("about:blank")
+
+    def _obter(self) -> SessaoNavegador:
+        while True:
+            with self._lock:
+                sessao = self._ociosas.pop() if self._ociosas else None
+            if sessao is None:
+                return self._nova_sessao()
+            if self._saudavel(sessao):
+                return sessao
+            logger.warning(f"[POOL] Sessão na porta {sessao.porta} não respondeu, descartando.")
+            sessao.fechar()
+
+    def _devolver(self, sessao: SessaoNavegador):
+        motivo = self._precisa_reciclar(sessao)
+        if not motivo:
+            try:
+                self._limpar(sessao)
+            except Exception as e:
+                motivo = f"falha ao limpar ({e})"
+
+        if motivo or self._encerrado:
+            if motivo:
+                logger.info(f"[POOL] Reciclando sessão na porta {sessao.porta}: {motivo}")
+            sessao.fechar()
+            return
+
+        with self._lock:
+            self._ociosas.append(sessao)
+
+    @contextmanager
+    def emprestar(self):
+        if self._encerrado:
+            raise RuntimeError("Pool de drivers já encerrado")
+
+        self._vagas.acquire()
+        try:
+            sessao = self._obter()
+            sessao.usos += 1
+            try:
+                yield sessao.driver
+            finally:
+                self._devolver(sessao)
+        finally:
+            self._vagas.release()
+
+    def encerrar(self):
+        self._encerrado = True
+        with self._lock:
+            ociosas, self._ociosas = self._ociosas, []
+        for sessao in ociosas:
+            sessao.fechar()
@@ -0,0 +1,129 @@
+"""
+Espera por prontidão da página no lugar de time.sleep fixo.
+
+Cada checagem Selenium cria um Prontidao com o orçamento de tempo da usina
+(cfg["timeout_prontidao"]). Os passos esperam por condições reais (DOM
+completo, rede ociosa, elemento visível) e registram quanto tempo foi
+economizado em relação ao sleep fixo que existia antes.
+"""
+import time
+import logging
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+logger = logging.getLogger("robo_solar")
+
+ORCAMENTO_PADRAO_S = 45
+POLL_S = 0.25
+
+JS_RECURSOS = "return [document.readyState, performance.getEntriesByType('resource').length];"
+
+
+class RedeOciosa:
+    """
+    Condição para WebDriverWait: documento completo e nenhum recurso novo
+    (XHR/fetch/imagens) registrado em performance por `ociosidade` segundos.
+    """
+
+    def __init__(self, ociosidade: float = 0.8):
+        self.ociosidade = ociosidade
+        self._ultimo_total = None
+        self._desde = None
+
+    def __call__(self, driver):
+        estado, total = driver.execute_script(JS_RECURSOS)
+        agora = time.monotonic()
+        if estado != "complete" or total != self._ultimo_total:
+            self._ultimo_total = total
+            self._desde = agora
+            return False
+        return agora - self._desde >= self.ociosidade
+
+
+def dom_completo(driver):
+    return driver.execute_script("return document.readyState;") == "complete"
+
+
+def texto_visivel(css: str):
+    """Elemento presente e com texto não vazio (SPA já hidratou)."""
+
+    def _condicao(driver):
+        for el in driver.find_elements(By.CSS_SELECTOR, css):
+            if (el.text or "").strip():
+                return el
+        return False
+
+    return _condicao
+
+
+def elemento_presente(css: str):
+    return EC.presence_of_element_located((By.CSS_SELECTOR, css))
+
+
+def xpath_clicavel(xpath: str):
+    return EC.element_to_be_clickable((By.XPATH, xpath))
+
+
+class Prontidao:
+    def __init__(self, driver, nome: str, orcamento_s: float = None):
+        self.driver = driver
+        self.nome = nome
+        self.orcamento_s = orcamento_s or ORCAMENTO_PADRAO_S
+        self.inicio = time.monotonic()
+        self.economia_total = 0.0
+
+    def restante(self) -> float:
+        return max(0.0, self.orcamento_s - (time.monotonic() - self.inicio))
+
+    def aguardar(self, condicao, passo: str, espera_fixa: float = 0, timeout: float = None):
+        """
+        Espera `condicao` dentro do orçamento restante (limitado a `timeout`).
+        Levanta TimeoutException se não ficar pronta a tempo.
+        """
+        limite = self.restante()
+        if timeout is not None:
+            limite = min(limite, timeout)
+
+        t0 = time.monotonic()
+        try:
+            resultado = WebDriverWait(
+                self.driver, max(limite, POLL_S), poll_frequency=POLL_S
+            ).until(condicao)
+        except TimeoutException:
+            msg = (
+                f"[{self.nome}] {passo}: não ficou pronto em {limite:.1f}s "
+                f"(orçamento restante {self.restante():.1f}s)"
+            )
+            logger.warning(msg)
+            raise
+
+        gasto = time.monotonic() - t0
+        if espera_fixa:
+            economia = espera_fixa - gasto
+            self.economia_total += economia
+            msg = (
+                f"[{self.nome}] {passo}: pronto em {gasto:.1f}s "
+                f"(sleep fixo era {espera_fixa:.0f}s, economia {economia:+.1f}s)"
+            )
+            logger.info(msg)
+        return resultado
+
+    def tentar(self, condicao, passo: str, espera_fixa: float = 0, timeout: float = None):
+        """Como aguardar(), mas devolve None em vez de levantar no timeout."""
+        try:
+            return self.aguardar(condicao, passo, espera_fixa, timeout)
+        except TimeoutException:
+            return None
+
+    def pagina_pronta(self, passo: str, espera_fixa: float = 0, timeout: float = None):
+        return self.tentar(RedeOciosa(), passo, espera_fixa, timeout)
+
+    def resumo(self):
+        msg = (
+            f"[{self.nome}] Prontidão: {time.monotonic() - self.inicio:.1f}s de "
+            f"checagem, economia total {self.economia_total:+.1f}s vs sleeps fixos"
+        )
+        logger.info(msg)
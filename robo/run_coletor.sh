@@ -0,0 +1,5 @@
+#!/bin/bash
+# Coletor em modo daemon (substitui a entrada do cron).
+cd /home/solar/monitoramento_solar/robo
+source /home/solar/monitoramento_solar/venv/bin/activate
+exec python coletar_status.py --daemon
@@ -0,0 +1,97 @@
+"""
+Sessões autenticadas reaproveitadas entre execuções (logins via Selenium).
+
+Depois de um login bem-sucedido, guarda cookies, localStorage e a URL da
+página pós-login da usina em cache/sessoes/<usina>.json. Na próxima
+checagem reinjeta tudo e o chamador confere, com um timeout curto, se a
+página de status abre sem login; só se não abrir é que refaz o login.
+"""
+import os
+import re
+import json
+import time
+import logging
+from urllib.parse import urlsplit
+
+logger = logging.getLogger("robo_solar")
+
+DIR_PADRAO = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "cache", "sessoes"
+)
+
+JS_LER_STORAGE = "return JSON.stringify(Object.assign({}, window.localStorage));"
+JS_GRAVAR_STORAGE = """
+const dados = JSON.parse(arguments[0]);
+for (const chave in dados) window.localStorage.setItem(chave, dados[chave]);
+"""
+
+
+class ArmazemSessoes:
+    def __init__(self, diretorio: str = None, ttl_h: float = None):
+        self.diretorio = diretorio or DIR_PADRAO
+        self.ttl_s = (ttl_h or float(os.getenv("SESSAO_TTL_H", "12"))) * 3600
+
+    def _caminho(self, nome: str) -> str:
+        arquivo = re.sub(r"[^A-Za-z0-9_-]+", "_", nome)
+        return os.path.join(self.diretorio, f"{arquivo}.json")
+
+    def salvar(self, nome: str, driver):
+        try:
+            dados = {
+                "salvo_em": time.time(),
+                "url": driver.current_url,
+                "cookies": driver.get_cookies(),
+                "local_storage": driver.execute_script(JS_LER_STORAGE),
+            }
+            os.makedirs(self.diretorio, exist_ok=True)
+            caminho = self._caminho(nome)
+            tmp = f"{caminho}.tmp"
+            # criado já com 0600: cookies/localStorage nunca ficam legíveis
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            # .tmp antigo mantém o modo de antes; corrige antes de escrever
+            os.fchmod(fd, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(dados, f)
+            os.replace(tmp, caminho)
+            logger.info(f"[{nome}] Sessão autenticada salva para a próxima execução.")
+        except Exception as e:
+            logger.warning(f"[{nome}] Não foi possível salvar a sessão: {e}")
+
+    def descartar(self, nome: str):
+        try:
+            os.remove(self._caminho(nome))
+        except OSError:
+            pass
+
+    def restaurar(self, nome: str, driver) -> bool:
+        """
+        Reinjeta a sessão salva e navega para a página pós-login.
+        Retorna False se não houver sessão válida para tentar.
+        """
+        try:
+            with open(self._caminho(nome), "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if time.time() - dados.get("salvo_em", 0) > self.ttl_s:
+            self.descartar(nome)
+            return False
+
+        partes = urlsplit(dados["url"])
+        origem = f"{partes.scheme}://{partes.netloc}/"
+
+        # cookies e localStorage só podem ser gravados estando na origem
+        driver.get(origem)
+        for cookie in dados.get("cookies", []):
+            try:
+                c = dict(cookie)
+                c.pop("sameSite", None)
+                driver.add_cookie(c)
+            except Exception:
+                pass
+        if dados.get("local_storage"):
+            driver.execute_script(JS_GRAVAR_STORAGE, dados["local_storage"])
+
+        driver.get(dados["url"])
+        return True
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Coletor HTTP direto do portal Solarman (home.solarmanpv.com).
+
+Repete as chamadas XHR/JSON que a SPA faz, autenticado com os mesmos
+cookies salvos (o JWT do cookie vira o header Authorization). Devolve a
+mesma estrutura de checar_ufv_casa4_detalhado:
+
+    {"status_geral": "ONLINE" | "OFFLINE" | "ERRO",
+     "placas": [{"codigo": "4139773808", "status": "ONLINE"}, ...]}
+
+A interpretação das respostas fica em funções puras, testadas em
+tests/test_solarman_api.py. Para ver o que sai de uma resposta salva do
+portal (DevTools > Network > device/search > copiar resposta):
+
+    python solarman_api.py --fixture resposta_dispositivos.json
+"""
+import os
+import json
+import pickle
+import logging
+import argparse
+import threading
+
+import requests
+
+logger = logging.getLogger("robo_solar")
+
+SOLARMAN_BASE = "https://home.solarmanpv.com"
+URL_ESTACOES = f"{SOLARMAN_BASE}/maintain-s/operating/station/search"
+URL_DISPOSITIVOS = f"{SOLARMAN_BASE}/maintain-s/operating/device/search"
+
+# connectStatus do portal: 1 = conectado, 0 = desconectado
+CONNECT_STATUS = {1: "ONLINE", 0: "OFFLINE"}
+
+
+class ErroSolarman(Exception):
+    pass
+
+
+def carregar_cookies(cookie_path: str) -> list:
+    """Cookies no formato Selenium (.pkl ou .json), como salvos em cookies/."""
+    if cookie_path.endswith(".pkl"):
+        with open(cookie_path, "rb") as f:
+            return pickle.load(f)
+    with open(cookie_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def extrair_jwt(cookies: list):
+    for cookie in cookies:
+        valor = cookie.get("value") or ""
+        if valor.startswith("eyJ"):
+            return valor
+    return None
+
+
+def mapear_status_dispositivo(valor) -> str:
+    """Aceita connectStatus numérico ou o texto exibido na tabela."""
+    if isinstance(valor, (int, float)) or (isinstance(valor, str) and valor.isdigit()):
+        return CONNECT_STATUS.get(int(valor), "ERRO")
+
+    texto = (valor or "").strip().lower()
+    if "desconectado" in texto or "offline" in texto:
+        return "OFFLINE"
+    if "conectado" in texto or "online" in texto:
+        return "ONLINE"
+    return "ERRO"
+
+
+def status_geral_por_placas(placas: list):
+    """Mesma regra do scraping: qualquer OFFLINE derruba; None se vazio."""
+    if not placas:
+        return None
+    if any(p["status"] == "OFFLINE" for p in placas):
+        return "OFFLINE"
+    if all(p["status"] == "ONLINE" for p in placas):
+        return "ONLINE"
+    return "ERRO"
+
+
+def _lista_da_resposta(payload) -> list:
+    if isinstance(payload, list):
+        return payload
+    for chave in ("data", "list", "records", "deviceList"):
+        valor = payload.get(chave)
+        if isinstance(valor, list):
+            return valor
+        if isinstance(valor, dict):
+            return _lista_da_resposta(valor)
+    return []
+
+
+def interpretar_dispositivos(payload) -> list:
+    """Resposta de device/search -> [{"codigo", "status"}, ...]."""
+    placas = []
+    for disp in _lista_da_resposta(payload):
+        codigo = str(disp.get("deviceSn") or disp.get("sn") or "").strip()
+        if not codigo:
+            continue
+        status = disp.get("connectStatus", disp.get("netState"))
+        placas.append({"codigo": codigo, "status": mapear_status_dispositivo(status)})
+    return placas
+
+
+def interpretar_estacoes(payload):
+    """Resposta de station/search -> id da primeira estação, ou None."""
+    for estacao in _lista_da_resposta(payload):
+        estacao = estacao.get("station", estacao)
+        if estacao.get("id"):
+            return estacao["id"]
+    return None
+
+
+class ClienteSolarman:
+    def __init__(self, cookie_path: str, station_id=None):
+        self.cookie_path = cookie_path
+        self.station_id = station_id
+        self.sessao = requests.Session()
+        self._cookies_mtime = None
+        self._lock = threading.Lock()
+
+    def _preparar_sessao(self):
+        """Recarrega cookies/JWT só quando o arquivo muda."""
+        mtime = os.path.getmtime(self.cookie_path)
+        if mtime == self._cookies_mtime:
+            return
+        cookies = carregar_cookies(self.cookie_path)
+        jwt = extrair_jwt(cookies)
+        if not jwt:
+            raise ErroSolarman("Sem JWT nos cookies do Solarman")
+
+        self.sessao.cookies.clear()
+        for c in cookies:
+            self.sessao.cookies.set(
+                c["name"], c["value"], domain=c.get("domain"), path=c.get("path", "/")
+            )
+        self.sessao.headers.update(
+            {
+                "Authorization": f"Bearer {jwt}",
+                "Accept": "application/json",
+                "Content-Type": "application/json",
+            }
+        )
+        self._cookies_mtime = mtime
+
+    def _post(self, url: str, corpo: dict, params: dict = None):
+        try:
+            resp = self.sessao.post(url, json=corpo, params=params, timeout=15)
+        except requests.RequestException as e:
+            raise ErroSolarman(f"rede: {e}") from e
+        if resp.status_code in (401, 403):
+            raise ErroSolarman(f"HTTP {resp.status_code}: sessão/cookies expirados")
+        if resp.status_code >= 400:
+            raise ErroSolarman(f"HTTP {resp.status_code} em {url}")
+        try:
+            return resp.json()
+        except ValueError as e:
+            raise ErroSolarman(f"resposta não-JSON em {url}") from e
+
+    def _estacao(self):
+        if self.station_id is None:
+            payload = self._post(URL_ESTACOES, {}, params={"page": 1, "size": 20})
+            self.station_id = interpretar_estacoes(payload)
+            if self.station_id is None:
+                raise ErroSolarman("Nenhuma estação na conta Solarman")
+        return self.station_id
+
+    def placas(self) -> list:
+        with self._lock:
+            self._preparar_sessao()
+            payload = self._post(
+                URL_DISPOSITIVOS,
+                {"stationId": self._estacao()},
+                params={"page": 1, "size": 100},
+            )
+        return interpretar_dispositivos(payload)
+
+
+def checar_solarman_http(cliente: ClienteSolarman, nome: str) -> dict:
+    """Mesmo retorno de checar_ufv_casa4_detalhado; levanta ErroSolarman."""
+    placas = cliente.placas()
+    status_geral = status_geral_por_placas(placas)
+    if status_geral is None:
+        raise ErroSolarman("Nenhum dispositivo na resposta")
+    msg = f"[{nome}] (http) {len(placas)} dispositivos, status geral {status_geral}"
+    logger.info(msg)
+    return {"status_geral": status_geral, "placas": placas}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Interpreta respostas gravadas do Solarman")
+    parser.add_argument(
+        "--fixture", required=True, help="JSON salvo de device/search"
+    )
+    args = parser.parse_args()
+
+    with open(args.fixture, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+    if isinstance(payload, dict) and "resposta" in payload:
+        payload = payload["resposta"]  # formato de tests/fixtures/solarman
+    placas = interpretar_dispositivos(payload)
+    print(
+        json.dumps(
+            {"status_geral": status_geral_por_placas(placas), "placas": placas},
+            indent=2,
+            ensure_ascii=False,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
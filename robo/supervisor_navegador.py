@@ -0,0 +1,262 @@
+"""
+Checagens via navegador em processos separados, com prazo rígido.
+
+Um Chrome travado dentro de uma checagem Selenium não tem como ser
+interrompido de dentro da thread. Por isso as funções de navegador rodam
+em workers de longa duração (um processo por vaga, cada um com o seu
+PoolDrivers) e o supervisor espera a resposta no máximo prazo_s segundos.
+Estourado o prazo, mata o grupo de processos do worker (chromedriver e
+Chrome juntos), varre Chromes e chromedrivers órfãos do robô e sobe um
+worker novo na próxima checagem.
+"""
+import os
+import sys
+import queue
+import shutil
+import signal
+import logging
+import multiprocessing
+
+from pool_drivers import PREFIXO_PERFIL, filhos_por_pai
+
+logger = logging.getLogger("robo_solar")
+
+
+class TempoEsgotado(Exception):
+    pass
+
+
+class ErroWorker(Exception):
+    pass
+
+
+def descendentes(pid: int) -> list:
+    """PIDs de todos os descendentes de pid (sem incluir o próprio)."""
+    try:
+        filhos = filhos_por_pai()
+    except OSError:
+        return []
+    encontrados = []
+    pendentes = list(filhos.get(pid, []))
+    while pendentes:
+        atual = pendentes.pop()
+        encontrados.append(atual)
+        pendentes.extend(filhos.get(atual, []))
+    return encontrados
+
+
+def _linha_comando(pid: int) -> list:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return f.read().decode("utf-8", "replace").split("\0")
+    except OSError:
+        return []
+
+
+def _perfil(pid: int):
+    """Diretório --user-data-dir do robô usado pelo processo, se houver."""
+    for arg in _linha_comando(pid):
+        if arg.startswith("--user-data-dir=") and PREFIXO_PERFIL in arg:
+            return arg.split("=", 1)[1]
+    return None
+
+
+def _pai_e_grupo(pid: int):
+    """(ppid, pgid) lidos de /proc/<pid>/stat, ou None."""
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            campos = f.read().rsplit(")", 1)[1].split()
+        return int(campos[1]), int(campos[2])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _chromedriver_orfao(pid: int) -> bool:
+    """
+    chromedriver adotado pelo init (pai morto com SIGKILL) ou que ficou no
+    grupo de um worker já morto (o worker faz setsid, pgid = pid dele).
+    """
+    linha = _linha_comando(pid)
+    if not linha or "chromedriver" not in os.path.basename(linha[0]):
+        return False
+    pai_grupo = _pai_e_grupo(pid)
+    if pai_grupo is None:
+        return False
+    ppid, pgid = pai_grupo
+    if ppid == 1:
+        return True
+    return pgid != pid and not os.path.exists(f"/proc/{pgid}")
+
+
+def _perfis(pids: list) -> set:
+    return {p for p in map(_perfil, pids) if p}
+
+
+def _matar(pids: list):
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def varrer_orfaos() -> int:
+    """
+    Mata Chromes do robô (perfil com PREFIXO_PERFIL) que não descendem
+    deste processo, e chromedrivers órfãos: sobras de workers mortos ou de
+    execuções anteriores.
+    """
+    protegidos = set(descendentes(os.getpid()))
+    protegidos.add(os.getpid())
+    orfaos = [
+        int(entrada)
+        for entrada in os.listdir("/proc")
+        if entrada.isdigit()
+        and int(entrada) not in protegidos
+        and (_perfil(int(entrada)) or _chromedriver_orfao(int(entrada)))
+    ]
+    if orfaos:
+        perfis = _perfis(orfaos)
+        _matar(orfaos)
+        for perfil in perfis:
+            shutil.rmtree(perfil, ignore_errors=True)
+        msg = f"[SUPERVISOR] {len(orfaos)} Chromes/chromedrivers órfãos finalizados."
+        logger.warning(msg)
+    return len(orfaos)
+
+
+def _encerrar_por_sinal(signum, frame):
+    sys.exit(0)
+
+
+def _laco_worker(conexao, ao_encerrar):
+    """Loop do processo filho: recebe (funcao, cfg), devolve o resultado."""
+    # grupo de processos próprio: o supervisor mata a árvore inteira de uma vez
+    os.setsid()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, _encerrar_por_sinal)
+    try:
+        while True:
+            try:
+                tarefa = conexao.recv()
+            except EOFError:
+                break
+            if tarefa is None:
+                break
+            funcao, cfg = tarefa
+            try:
+                conexao.send(("ok", funcao(cfg)))
+            except Exception as e:
+                conexao.send(("erro", f"{type(e).__name__}: {e}"))
+    finally:
+        if ao_encerrar is not None:
+            ao_encerrar()
+
+
+class WorkerNavegador:
+    def __init__(self, contexto, ao_encerrar=None):
+        self.conexao, conexao_filho = contexto.Pipe()
+        self.processo = contexto.Process(
+            target=_laco_worker,
+            args=(conexao_filho, ao_encerrar),
+            name="coleta-nav-worker",
+            daemon=True,
+        )
+        self.processo.start()
+        conexao_filho.close()
+
+    def vivo(self) -> bool:
+        return self.processo.is_alive()
+
+    def executar(self, funcao, cfg: dict, prazo_s: float):
+        self.conexao.send((funcao, cfg))
+        if not self.conexao.poll(prazo_s):
+            raise TempoEsgotado(f"sem resposta em {prazo_s:.0f}s")
+        try:
+            tipo, valor = self.conexao.recv()
+        except EOFError:
+            raise ErroWorker(f"worker morreu (exit code {self.processo.exitcode})")
+        if tipo == "erro":
+            raise ErroWorker(valor)
+        return valor
+
+    def matar(self):
+        """Mata o worker, o chromedriver e os Chromes dele."""
+        pid = self.processo.pid
+        arvore = descendentes(pid)
+        perfis = _perfis(arvore)
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except OSError:
+            pass
+        # Chromes que tenham saído do grupo do worker
+        _matar(arvore)
+        self.processo.join(5)
+        self.conexao.close()
+        for perfil in perfis:
+            shutil.rmtree(perfil, ignore_errors=True)
+
+    def encerrar(self, prazo_s: float = 15):
+        try:
+            self.conexao.send(None)
+        except OSError:
+            pass
+        self.processo.join(prazo_s)
+        if self.processo.is_alive():
+            self.matar()
+        else:
+            self.conexao.close()
+
+
+class SupervisorNavegador:
+    """
+    Uso:
+        status = SUPERVISOR.executar(checar_usina, cfg)
+
+    funcao precisa ser de nível de módulo (vai por pickle para o worker).
+    """
+
+    def __init__(self, tamanho: int = None, prazo_s: float = None, ao_encerrar=None):
+        self.tamanho = tamanho or int(os.getenv("COLETA_WORKERS_NAVEGADOR", "2"))
+        self.prazo_s = prazo_s or float(os.getenv("COLETA_PRAZO_S", "240"))
+        self.ao_encerrar = ao_encerrar
+        # spawn: o pai tem threads (pools, agendador), fork não é seguro
+        self._contexto = multiprocessing.get_context("spawn")
+        # None = vaga sem worker; o processo sobe sob demanda
+        self._vagas = queue.Queue()
+        for _ in range(self.tamanho):
+            self._vagas.put(None)
+        varrer_orfaos()
+
+    def executar(self, funcao, cfg: dict):
+        nome = cfg["nome"]
+        prazo_s = cfg.get("prazo_s") or self.prazo_s
+        worker = self._vagas.get()
+        try:
+            if worker is None or not worker.vivo():
+                worker = WorkerNavegador(self._contexto, self.ao_encerrar)
+            return worker.executar(funcao, cfg, prazo_s)
+        except TempoEsgotado:
+            msg = f"[{nome}] Checagem via navegador passou de {prazo_s:.0f}s, matando o worker."
+            logger.error(msg)
+            worker.matar()
+            varrer_orfaos()
+            worker = None
+            raise
+        except ErroWorker:
+            if not worker.vivo():
+                worker.matar()
+                varrer_orfaos()
+                worker = None
+            raise
+        finally:
+            self._vagas.put(worker)
+
+    def encerrar(self):
+        while True:
+            try:
+                worker = self._vagas.get_nowait()
+            except queue.Empty:
+                break
+            if worker is not None:
+                worker.encerrar()
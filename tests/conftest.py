@@ -0,0 +1,9 @@
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# os módulos do robô se importam pelo nome curto (rodam de dentro de robo/)
+for caminho in (RAIZ, os.path.join(RAIZ, "robo")):
+    if caminho not in sys.path:
+        sys.path.insert(0, caminho)
@@ -0,0 +1,57 @@
+"""Regras de intervalo do AgendadorColeta, sem motor de coleta real."""
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+import pytest
+
+from agendador import AgendadorColeta
+
+CFG = {"nome": "UFV TESTE"}
+MEIO_DIA = datetime.now().replace(hour=12, minute=0)
+
+
+class MotorImediato:
+    """Conclui a coleta já dentro de submeter(), como uma coleta muito rápida."""
+
+    def __init__(self, resultados):
+        self.resultados = list(resultados)
+
+    def submeter(self, cfg):
+        future = Future()
+        future.set_result(self.resultados.pop(0))
+        return future
+
+
+@pytest.fixture
+def agendador(monkeypatch):
+    monkeypatch.setenv("COLETA_JITTER_S", "0")
+    return AgendadorColeta(MotorImediato([]), [CFG], lambda cfg, res: None)
+
+
+def test_sem_mudanca_apos_partida_nao_usa_ritmo_rapido(agendador):
+    agendador._observar(CFG, {"status": "ONLINE"})
+    agendador._observar(CFG, {"status": "ONLINE"})
+    assert agendador.regra(CFG, time.monotonic(), MEIO_DIA) == "normal"
+
+
+def test_estavel_e_mudanca(agendador):
+    agendador._observar(CFG, {"status": "ONLINE"})
+    agora = time.monotonic()
+    assert agendador.regra(CFG, agora + agendador.estavel_apos_s, MEIO_DIA) == "estavel"
+    agendador._observar(CFG, {"status": "OFFLINE"})
+    assert agendador.regra(CFG, time.monotonic(), MEIO_DIA) == "mudanca"
+
+
+def test_coleta_rapida_com_mudanca_mantem_proxima_antecipada(monkeypatch):
+    monkeypatch.setenv("COLETA_JITTER_S", "0")
+    motor = MotorImediato([{"status": "OFFLINE"}])
+    agendador = AgendadorColeta(motor, [CFG], lambda cfg, res: None)
+    agendador._assinaturas[CFG["nome"]] = ("ONLINE", ())
+    monkeypatch.setattr("agendador.em_horario_sol", lambda momento: True)
+
+    agora = time.monotonic()
+    agendador._disparar(CFG, agora)
+
+    # a mudança vista na coleta encurta para o intervalo de "mudanca"
+    assert agendador._proxima[CFG["nome"]] - agora <= agendador.intervalos["mudanca"] + 1
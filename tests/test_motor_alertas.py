@@ -0,0 +1,78 @@
+"""
+Máquina de estados dos alertas, com o DespachanteAlertas de verdade (dedup
+incluído), mas sem thread de envio nem banco.
+"""
+import pytest
+
+import motor_alertas
+from alertas import DespachanteAlertas
+from motor_alertas import MotorAlertas
+
+CFG = {"nome": "UFV TESTE", "responsavel": ""}
+
+
+@pytest.fixture
+def despachante(tmp_path, monkeypatch):
+    monkeypatch.setattr(DespachanteAlertas, "iniciar", lambda self: None)
+    return DespachanteAlertas(str(tmp_path / "saida.json"))
+
+
+@pytest.fixture
+def motor(despachante, tmp_path, monkeypatch):
+    monkeypatch.setenv("ALERTA_CONFIRMACOES", "2")
+    monkeypatch.setenv("ALERTA_CONFIRMACOES_RECUPERACAO", "2")
+    monkeypatch.setenv("ALERTA_OSCILACAO_JANELA_S", "600")
+    monkeypatch.setenv("ALERTA_OSCILACAO_LIMITE", "4")
+    monkeypatch.setenv("ALERTA_ESCALONAR_APOS_S", "0")
+    # sem histórico: o tempo parado sai do próprio estado
+    monkeypatch.setattr(motor_alertas, "intervalo_parada", lambda nome: (None, None))
+    m = MotorAlertas(despachante, str(tmp_path / "estado.json"))
+    m._carregado = True
+    return m
+
+
+def _rodar(motor, leituras, inicio=1000.0, passo=60.0):
+    agora = inicio
+    for status in leituras:
+        motor._avaliar(CFG, status, agora)
+        agora += passo
+    return agora
+
+
+def _chaves(despachante):
+    return [p["chave"] for p in despachante._pendentes]
+
+
+def test_nova_queda_logo_apos_recuperacao_gera_alerta(motor, despachante):
+    fim = _rodar(motor, ["OFFLINE", "OFFLINE", "ONLINE", "ONLINE"], passo=300)
+    _rodar(motor, ["OFFLINE", "OFFLINE", "ONLINE", "ONLINE"], inicio=fim, passo=300)
+
+    chaves = _chaves(despachante)
+    assert sum(":OFFLINE:" in c for c in chaves) == 2
+    assert sum(":recuperacao:" in c for c in chaves) == 2
+
+
+def test_nova_oscilacao_depois_de_estabilizar_gera_alerta(motor, despachante):
+    oscilar = ["OFFLINE", "ONLINE"] * 3
+    fim = _rodar(motor, oscilar)
+    assert motor._estados[CFG["nome"]]["estado"] == "oscilando"
+
+    # estável além da janela de oscilação: sai de "oscilando"
+    fim = _rodar(motor, ["ONLINE"] * 12, inicio=fim)
+    assert motor._estados[CFG["nome"]]["estado"] == "normal"
+
+    # volta a oscilar dentro de ALERTAS_DEDUP_S (1800 s)
+    _rodar(motor, oscilar, inicio=fim)
+    assert motor._estados[CFG["nome"]]["estado"] == "oscilando"
+
+    chaves = _chaves(despachante)
+    assert sum(":oscilando:" in c for c in chaves) == 2
+    assert len(set(chaves)) == len(chaves)
+
+
+def test_tempo_parado_para_na_primeira_leitura_online(motor, despachante):
+    _rodar(motor, ["OFFLINE", "OFFLINE", "ONLINE", "ONLINE"], passo=300)
+
+    recuperacao = [p for p in despachante._pendentes if ":recuperacao:" in p["chave"]]
+    # OFFLINE em 1000, primeiro ONLINE em 1600: 10 min, sem as confirmações
+    assert recuperacao[0]["resumo"].endswith("após 10min")
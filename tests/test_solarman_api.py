@@ -0,0 +1,69 @@
+"""
+Interpretação das respostas do Solarman.
+
+As amostras em fixtures/solarman/ são sintéticas, montadas no formato
+conhecido do portal (não são capturas). Ao capturar uma resposta real,
+salve-a ali no mesmo formato {"descricao", "resposta", "esperado"}.
+"""
+import os
+import glob
+import json
+
+import pytest
+
+from solarman_api import (
+    interpretar_dispositivos,
+    interpretar_estacoes,
+    mapear_status_dispositivo,
+    status_geral_por_placas,
+)
+
+DIR_FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "solarman")
+
+
+def _fixtures(prefixo):
+    return sorted(glob.glob(os.path.join(DIR_FIXTURES, f"{prefixo}*.json")))
+
+
+def _carregar(caminho):
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("caminho", _fixtures("dispositivos"), ids=os.path.basename)
+def test_dispositivos(caminho):
+    fixture = _carregar(caminho)
+    placas = interpretar_dispositivos(fixture["resposta"])
+    assert placas == fixture["esperado"]["placas"]
+    assert status_geral_por_placas(placas) == fixture["esperado"]["status_geral"]
+
+
+@pytest.mark.parametrize("caminho", _fixtures("estacoes"), ids=os.path.basename)
+def test_estacoes(caminho):
+    fixture = _carregar(caminho)
+    assert interpretar_estacoes(fixture["resposta"]) == fixture["esperado"]["station_id"]
+
+
+@pytest.mark.parametrize(
+    "valor, esperado",
+    [
+        (1, "ONLINE"),
+        (0, "OFFLINE"),
+        ("0", "OFFLINE"),
+        (7, "ERRO"),
+        ("Desconectado", "OFFLINE"),
+        ("Conectado", "ONLINE"),
+        (None, "ERRO"),
+    ],
+)
+def test_mapear_status_dispositivo(valor, esperado):
+    assert mapear_status_dispositivo(valor) == esperado
+
+
+def test_status_geral_sem_placas():
+    assert status_geral_por_placas([]) is None
+
+
+def test_status_geral_sem_offline_mas_com_erro():
+    placas = [{"codigo": "1", "status": "ONLINE"}, {"codigo": "2", "status": "ERRO"}]
+    assert status_geral_por_placas(placas) == "ERRO"
@@ -1,18 +1,33 @@
 import os
+import sys
 import json
-import base64
-import pickle
+import time
+import hashlib
+import queue
+import threading
 from datetime import datetime
 
-from flask import Flask, render_template
+from flask import (
+    Flask,
+    Response,
+    abort,
+    render_template,
+    request,
+    stream_with_context,
+)
 from dotenv import load_dotenv
-import mysql.connector
 
 # Caminho do .env (na raiz do projeto: ~/solar-dashboard/.env)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 ENV_PATH = os.path.join(BASE_DIR, ".env")
 load_dotenv(ENV_PATH)
 
+sys.path.insert(0, BASE_DIR)
+from comum.cookies_info import info_arquivo  # noqa: E402
+from comum.db import cursor  # noqa: E402
+from comum.marcador_ciclo import marcar_ciclo, versao_ciclo  # noqa: E402
+from comum.web import configurar_producao  # noqa: E402
+
 USINA_URLS = {
     "UFV CASA 4": "https://home.solarmanpv.com/plant/infos/data",
     "UFV-ATLANTA": "http://server.growatt.com",
@@ -20,136 +35,382 @@ USINA_URLS = {
     "UFV HELENA-2": "https://web3.isolarcloud.com.hk/#/plantList",
 }
 
+INFO_EXTRA = {
+    "UFV-ATLANTA": {
+        "descricao": "Atlanta SEDE",
+        "maps_url": os.getenv("MAPS_UFV_ATLANTA", ""),
+    },
+    "UFV CASA 4": {
+        "descricao": "Casa Mardonio",
+        "maps_url": os.getenv("MAPS_UFV_CASA4", ""),
+    },
+    "UFV-HELENA-1": {
+        "descricao": "Lado Casa Mardonio",
+        "maps_url": os.getenv("MAPS_UFV_HELENA1", ""),
+    },
+    "UFV HELENA-2": {
+        "descricao": "Galpões",
+        "maps_url": os.getenv("MAPS_UFV_HELENA2", ""),
+    },
+}
+
 app = Flask(__name__)
+configurar_producao(app)
 
 
 def verificar_expiracao_cookies_web():
-    """Retorna info de expiração dos cookies do Solarman."""
-    cookie_path = os.path.join(BASE_DIR, "cookies", "cookies_solarman.pkl")
+    """Info de expiração dos cookies do Solarman (calculada só quando o arquivo muda)."""
+    info = info_arquivo(os.path.join(BASE_DIR, "cookies", "cookies_solarman.pkl"))
+    # sem data conhecida só some o banner; ausente/ilegível vira URGENTE
+    if info["expira_ts"] is None and not info["precisa_renovar"]:
+        return None
+    return info
+
+
+def get_status_usinas():
+    """
+    Usinas com as suas placas numa única consulta (LEFT JOIN), agrupadas
+    em memória: o custo não cresce com o número de usinas com placas.
+    """
+    with cursor(dictionary=True) as cur:
+        cur.execute(
+            """
+            SELECT u.nome_usina, u.status, u.updated_at,
+                   p.codigo_placa, p.status AS status_placa,
+                   p.updated_at AS updated_at_placa
+            FROM usinas_status u
+            LEFT JOIN placas_status p ON p.nome_usina = u.nome_usina
+            ORDER BY u.nome_usina, p.codigo_placa
+            """
+        )
+        rows = cur.fetchall()
+
+    usinas = {}
+    for row in rows:
+        nome = row["nome_usina"]
+        if nome not in usinas:
+            usinas[nome] = {
+                "nome_usina": nome,
+                "status": row["status"],
+                "updated_at": row["updated_at"],
+                "placas": [],
+            }
+        if row["codigo_placa"] is not None:
+            usinas[nome]["placas"].append(
+                {
+                    "codigo_placa": row["codigo_placa"],
+                    "status": row["status_placa"],
+                    "updated_at": row["updated_at_placa"],
+                }
+            )
+    return list(usinas.values())
+
+
+def montar_snapshot() -> dict:
+    """Tudo o que a página precisa, pronto para ser servido a todos os viewers."""
+    usinas = get_status_usinas()
+
+    for u in usinas:
+        nome = u.get("nome_usina")
+        u["url_monitor"] = USINA_URLS.get(nome)
+        extra = INFO_EXTRA.get(nome, {})
+        u["descricao"] = extra.get("descricao", "")
+        u["maps_url"] = extra.get("maps_url", "")
+
+    return {
+        "usinas": usinas,
+        "cookies_info": verificar_expiracao_cookies_web(),
+        "gerado_em": datetime.now(),
+    }
+
 
-    if not os.path.exists(cookie_path):
+class CacheDashboard:
+    """
+    Snapshot único da dashboard. É refeito quando o robô marca um ciclo
+    novo (comum.marcador_ciclo) ou quando o TTL vence; enquanto isso todos
+    os acessos são servidos da memória.
+    """
+
+    def __init__(self, montar, ttl_s: float = None):
+        self.montar = montar
+        self.ttl_s = ttl_s or float(os.getenv("DASHBOARD_CACHE_TTL_S", "60"))
+        self._snapshot = None
+        self._versao = None
+        self._montado_em = 0.0
+        self._lock = threading.Lock()
+
+    def _valido(self, versao: int) -> bool:
+        return (
+            self._snapshot is not None
+            and self._versao == versao
+            and time.monotonic() - self._montado_em < self.ttl_s
+        )
+
+    def obter(self) -> dict:
+        versao = versao_ciclo()
+        if self._valido(versao):
+            return self._snapshot
+        # um só request refaz o snapshot; os demais esperam e reaproveitam
+        with self._lock:
+            if not self._valido(versao):
+                self._snapshot = self.montar()
+                self._versao = versao
+                self._montado_em = time.monotonic()
+            return self._snapshot
+
+
+CACHE_DASHBOARD = CacheDashboard(montar_snapshot)
+
+
+def _formatar_data(valor):
+    return valor.strftime("%d/%m/%Y %H:%M:%S") if valor else ""
+
+
+def _estado_cookies(info):
+    """Campos do banner de cookies (None = sem banner)."""
+    if not info:
         return None
+    return {
+        "cor": info["cor"],
+        "dias_restantes": info["dias_restantes"],
+        "expira_em": info["expira_em"],
+    }
+
+
+def estado_snapshot(snapshot: dict) -> dict:
+    """Só o que os cards e o banner de cookies mostram e pode mudar entre ciclos."""
+    return {
+        "usinas": {
+            u["nome_usina"]: {
+                "status": u["status"],
+                "updated_at": _formatar_data(u.get("updated_at")),
+                "placas": {p["codigo_placa"]: p["status"] for p in u["placas"]},
+            }
+            for u in snapshot["usinas"]
+        },
+        "cookies": _estado_cookies(snapshot["cookies_info"]),
+    }
+
+
+def diferencas(antes: dict, depois: dict) -> list:
+    """[(evento, dados), ...] para levar a página de `antes` para `depois`."""
+    usinas_antes, usinas_depois = antes["usinas"], depois["usinas"]
+    mesma_estrutura = set(usinas_antes) == set(usinas_depois) and all(
+        set(usinas_antes[nome]["placas"]) == set(usinas_depois[nome]["placas"])
+        for nome in usinas_depois
+    )
+    if not mesma_estrutura:
+        # usina/placa nova ou removida: a página precisa ser redesenhada
+        return [("recarregar", {})]
+
+    eventos = []
+    if antes["cookies"] != depois["cookies"]:
+        # dias restantes mudam sem recarga: painel de parede também é avisado
+        eventos.append(("cookies", {"info": depois["cookies"]}))
+    for nome, novo in usinas_depois.items():
+        velho = usinas_antes[nome]
+        if (novo["status"], novo["updated_at"]) != (velho["status"], velho["updated_at"]):
+            dados = {"nome": nome, "status": novo["status"], "updated_at": novo["updated_at"]}
+            eventos.append(("usina", dados))
+        for codigo, status in novo["placas"].items():
+            if status != velho["placas"][codigo]:
+                eventos.append(("placa", {"nome": nome, "codigo": codigo, "status": status}))
+    return eventos
+
 
-    try:
-        with open(cookie_path, "rb") as f:
-            cookies = pickle.load(f)
+class PublicadorEventos:
+    """
+    Uma thread por processo observa o CACHE_DASHBOARD e manda para cada
+    navegador conectado em /eventos só as mudanças de usina, placa e do
+    banner de cookies. A thread sobe no primeiro assinante (depois do fork
+    do servidor WSGI).
+    """
 
-        for cookie in cookies:
-            if "value" in cookie and cookie["value"].startswith("eyJ"):
+    def __init__(self, cache: CacheDashboard, intervalo_s: float = None):
+        self.cache = cache
+        self.intervalo_s = intervalo_s or float(os.getenv("DASHBOARD_SSE_POLL_S", "2"))
+        self._assinantes: list[queue.Queue] = []
+        self._snapshot = None
+        self._estado = None
+        self._lock = threading.Lock()
+        self._thread_pid = None
+
+    def _garantir_thread(self):
+        if self._thread_pid == os.getpid():
+            return
+        self._thread_pid = os.getpid()
+        threading.Thread(target=self._laco, name="sse-dashboard", daemon=True).start()
+
+    def assinar(self):
+        """Devolve (fila, estado atual completo) para um novo stream."""
+        snapshot = self.cache.obter()
+        with self._lock:
+            self._garantir_thread()
+            if self._estado is None:
+                self._snapshot, self._estado = snapshot, estado_snapshot(snapshot)
+            fila = queue.Queue(maxsize=100)
+            self._assinantes.append(fila)
+            return fila, self._estado
+
+    def cancelar(self, fila: queue.Queue):
+        with self._lock:
+            if fila in self._assinantes:
+                self._assinantes.remove(fila)
+
+    def _publicar(self, eventos: list):
+        with self._lock:
+            for fila in list(self._assinantes):
                 try:
-                    payload_b64 = cookie["value"].split(".")[1]
-                    payload_b64 += "=" * (4 - len(payload_b64) % 4)
-                    payload_json = base64.b64decode(payload_b64).decode("utf-8")
-                    payload = json.loads(payload_json)
-
-                    if "exp" in payload:
-                        exp_timestamp = payload["exp"]
-                        exp_date = datetime.fromtimestamp(exp_timestamp)
-                        agora = datetime.now()
-                        dias_restantes = (exp_date - agora).days
-
-                        return {
-                            "dias_restantes": dias_restantes,
-                            "expira_em": exp_date.strftime("%d/%m/%Y"),
-                            "cor": (
-                                "success"
-                                if dias_restantes > 10
-                                else ("warning" if dias_restantes > 5 else "danger")
-                            ),
-                        }
-                except:
-                    continue
-    except:
-        pass
+                    for evento in eventos:
+                        fila.put_nowait(evento)
+                except queue.Full:
+                    # cliente parado: derruba, o EventSource reconecta sozinho
+                    self._assinantes.remove(fila)
+                    try:
+                        fila.get_nowait()
+                    except queue.Empty:
+                        pass
+                    fila.put_nowait(("fim", {}))
 
-    return None
+    def _laco(self):
+        while True:
+            time.sleep(self.intervalo_s)
+            try:
+                snapshot = self.cache.obter()
+            except Exception as e:
+                app.logger.warning(f"[SSE] Falha ao atualizar snapshot: {e}")
+                continue
+            if snapshot is self._snapshot:
+                continue
+            novo = estado_snapshot(snapshot)
+            with self._lock:
+                eventos = diferencas(self._estado, novo) if self._assinantes else []
+                self._snapshot, self._estado = snapshot, novo
+            if eventos:
+                self._publicar(eventos)
 
 
-def get_db_connection():
-    return mysql.connector.connect(
-        unix_socket="/var/run/mysqld/mysqld.sock",
-        user=os.getenv("DB_USER", "solar_user"),
-        password=os.getenv("DB_PASS"),
-        database=os.getenv("DB_NAME", "solar_monitor"),
-    )
-    
-def get_placas_usina(nome_usina: str):
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
-    cur.execute(
-        """
-        SELECT codigo_placa, status, updated_at
-        FROM placas_status
-        WHERE nome_usina = %s
-        ORDER BY codigo_placa
-        """,
-        (nome_usina,),
-    )
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    return rows
+PUBLICADOR = PublicadorEventos(CACHE_DASHBOARD)
 
 
-def get_status_usinas():
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
-    cur.execute(
-        """
-        SELECT nome_usina, status, updated_at
-        FROM usinas_status
-        ORDER BY nome_usina
-        """
-    )
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    return rows
+def _sse(evento: str, dados: dict) -> str:
+    return f"event: {evento}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
 
 
 @app.route("/")
 def dashboard():
-    usinas = get_status_usinas()
+    snapshot = CACHE_DASHBOARD.obter()
+    return render_template(
+        "index.html", usinas=snapshot["usinas"], cookies_info=snapshot["cookies_info"]
+    )
 
-    info_extra = {
-        "UFV-ATLANTA": {
-            "descricao": "Atlanta SEDE",
-            "maps_url": os.getenv("MAPS_UFV_ATLANTA", ""),
-        },
-        "UFV CASA 4": {
-            "descricao": "Casa Mardonio",
-            "maps_url": os.getenv("MAPS_UFV_CASA4", ""),
-        },
-        "UFV-HELENA-1": {
-            "descricao": "Lado Casa Mardonio",
-            "maps_url": os.getenv("MAPS_UFV_HELENA1", ""),
-        },
-        "UFV HELENA-2": {
-            "descricao": "Galpões",
-            "maps_url": os.getenv("MAPS_UFV_HELENA2", ""),
-        },
-    }
 
-    for u in usinas:
-        nome = u.get("nome_usina")
-        u["url_monitor"] = USINA_URLS.get(nome)
-        # if isinstance(u.get("updated_at"), datetime):
-        #    continue
-        extra = info_extra.get(nome, {})
-        u["descricao"] = extra.get("descricao", "")
-        u["maps_url"] = extra.get("maps_url", "")
-    # Verificar cookies Solarman
-    
-        if nome == "UFV CASA 4":
-            u["placas"] = get_placas_usina(nome)  # TODAS as placas
-        else:
-            u["placas"] = []
-    
-    cookies_info = verificar_expiracao_cookies_web()
+@app.route("/eventos")
+def eventos():
+    """Server-Sent Events: estado completo na conexão, depois só mudanças."""
+    keepalive_s = float(os.getenv("DASHBOARD_SSE_KEEPALIVE_S", "25"))
+
+    def stream():
+        # assina só quando o gerador começa: toda assinatura tem o seu
+        # cancelar() no finally, mesmo se o cliente cair antes do 1º yield
+        fila, estado = PUBLICADOR.assinar()
+        try:
+            yield "retry: 5000\n"
+            yield _sse("estado", estado)
+            while True:
+                try:
+                    evento, dados = fila.get(timeout=keepalive_s)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                if evento == "fim":
+                    return
+                yield _sse(evento, dados)
+        finally:
+            PUBLICADOR.cancelar(fila)
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _iso(valor):
+    return valor.isoformat() if valor else None
+
+
+def _placas_json(placas: list) -> list:
+    return [
+        {
+            "codigo": p["codigo_placa"],
+            "status": p["status"],
+            "updated_at": _iso(p["updated_at"]),
+        }
+        for p in placas
+    ]
+
+
+def _resposta_condicional(dados, modificado_em):
+    """
+    JSON com ETag forte (hash do corpo) e Last-Modified do updated_at mais
+    recente; responde 304 se o cliente já tem essa versão.
+    """
+    corpo = json.dumps(dados, ensure_ascii=False, sort_keys=True)
+    resp = Response(corpo, mimetype="application/json")
+    resp.set_etag(hashlib.sha1(corpo.encode("utf-8")).hexdigest())
+    if modificado_em:
+        # updated_at é hora local sem fuso; astimezone() assume a do servidor
+        resp.last_modified = modificado_em.astimezone()
+    resp.cache_control.no_cache = True
+    return resp.make_conditional(request)
+
+
+@app.route("/api/usinas")
+def api_usinas():
+    usinas = CACHE_DASHBOARD.obter()["usinas"]
+    dados = [
+        {
+            "nome": u["nome_usina"],
+            "status": u["status"],
+            "updated_at": _iso(u["updated_at"]),
+            "descricao": u["descricao"],
+            "maps_url": u["maps_url"],
+            "url_monitor": u["url_monitor"],
+            "placas": _placas_json(u["placas"]),
+        }
+        for u in usinas
+    ]
+    datas = [u["updated_at"] for u in usinas if u["updated_at"]]
+    datas += [p["updated_at"] for u in usinas for p in u["placas"] if p["updated_at"]]
+    return _resposta_condicional(dados, max(datas, default=None))
+
+
+@app.route("/api/usinas/<nome>/placas")
+def api_placas_usina(nome):
+    usina = next(
+        (u for u in CACHE_DASHBOARD.obter()["usinas"] if u["nome_usina"] == nome), None
+    )
+    if usina is None:
+        abort(404)
+    placas = usina["placas"]
+    datas = [p["updated_at"] for p in placas if p["updated_at"]]
+    return _resposta_condicional(_placas_json(placas), max(datas, default=None))
+
 
-    return render_template("index.html", usinas=usinas, cookies_info=cookies_info)
+@app.route("/cache/invalidar", methods=["POST"])
+def invalidar_cache():
+    """
+    Força a releitura do banco no próximo acesso (ex.: após ajuste manual).
+    Vai pelo marcador de ciclo, que todos os workers do gunicorn leem.
+    """
+    token = os.getenv("DASHBOARD_TOKEN_INVALIDACAO", "")
+    if not token or request.headers.get("X-Token") != token:
+        abort(403)
+    marcar_ciclo()
+    return "", 204
 
 
 if __name__ == "__main__":
-    # dev: porta 5000 aberta em todas interfaces
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    # dev: porta 5000 aberta em todas interfaces (produção: gunicorn.conf.py)
+    app.run(host="0.0.0.0", port=5000, debug=os.getenv("FLASK_DEBUG") == "1")
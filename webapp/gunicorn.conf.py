@@ -0,0 +1,10 @@
+"""Gunicorn da dashboard; o restante vem de comum/gunicorn_base.py."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from comum.gunicorn_base import *  # noqa: E402,F401,F403
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+# mais threads: cada tela aberta segura uma conexão SSE
+threads = int(os.getenv("GUNICORN_THREADS", "16"))
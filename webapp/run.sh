@@ -1,6 +1,10 @@
 #!/bin/bash
+# Produção: gunicorn (gunicorn.conf.py). Desenvolvimento: ./run.sh --dev
 cd "$(dirname "$0")"
 source ../env/venv/bin/activate
-export FLASK_APP=app.py
-export FLASK_ENV=development
-flask run --host=0.0.0.0 --port=5000
+if [ "$1" = "--dev" ]; then
+    export FLASK_APP=app.py
+    export FLASK_DEBUG=1
+    exec flask run --host=0.0.0.0 --port=5000
+fi
+exec gunicorn -c gunicorn.conf.py app:app
@@ -0,0 +1,143 @@
+// Atualização ao vivo da dashboard via Server-Sent Events (/eventos).
+// O servidor manda o estado completo ao conectar e depois só as mudanças;
+// aqui os cards e o banner de cookies são corrigidos no lugar, sem
+// recarregar a página.
+(function () {
+    "use strict";
+
+    var CLASSES = { ONLINE: "online", OFFLINE: "offline" };
+    var TEXTOS = { ONLINE: "🟢 Online", OFFLINE: "🔴 Offline" };
+    var ICONES = { ONLINE: "🟢", OFFLINE: "🔴" };
+
+    function cardDaUsina(nome) {
+        var cards = document.querySelectorAll("[data-usina]");
+        for (var i = 0; i < cards.length; i++) {
+            if (cards[i].getAttribute("data-usina") === nome) {
+                return cards[i];
+            }
+        }
+        return null;
+    }
+
+    function aplicarUsina(nome, status, updatedAt) {
+        var card = cardDaUsina(nome);
+        if (!card) {
+            return;
+        }
+        card.classList.remove("online", "offline", "erro");
+        card.classList.add(CLASSES[status] || "erro");
+
+        var texto = card.querySelector('[data-campo="status"]');
+        if (texto) {
+            texto.textContent = TEXTOS[status] || "⚠️ Erro";
+        }
+        var data = card.querySelector('[data-campo="updated_at"]');
+        if (data && updatedAt !== undefined) {
+            data.textContent = updatedAt;
+        }
+    }
+
+    function aplicarPlaca(nome, codigo, status) {
+        var card = cardDaUsina(nome);
+        if (!card) {
+            return;
+        }
+        var linhas = card.querySelectorAll("[data-placa]");
+        for (var i = 0; i < linhas.length; i++) {
+            if (linhas[i].getAttribute("data-placa") === codigo) {
+                var icone = linhas[i].querySelector('[data-campo="icone"]');
+                if (icone) {
+                    icone.textContent = ICONES[status] || "⚠️";
+                }
+            }
+        }
+    }
+
+    // mesmos textos dos três casos do banner em index.html
+    function aplicarCookies(info) {
+        var banner = document.querySelector("[data-banner-cookies]");
+        if (!banner) {
+            return;
+        }
+        while (banner.firstChild) {
+            banner.removeChild(banner.firstChild);
+        }
+        if (!info) {
+            return;
+        }
+        var alerta = document.createElement("div");
+        alerta.className = "alert alert-" + info.cor + " text-center";
+
+        function texto(t) {
+            alerta.appendChild(document.createTextNode(t));
+        }
+        function negrito(t) {
+            var strong = document.createElement("strong");
+            strong.textContent = t;
+            alerta.appendChild(strong);
+        }
+
+        var dias = info.dias_restantes;
+        if (dias > 5) {
+            texto("🔑 Cookies UFV CASA 4 expiram em ");
+            negrito(dias + " dias");
+            texto(" (" + info.expira_em + ")");
+        } else if (dias > 0) {
+            texto("⚠️ ");
+            negrito("ATENÇÃO:");
+            texto(" Cookies UFV CASA 4 expiram em " + dias + " dias! Renove em breve.");
+        } else {
+            texto("❌ ");
+            negrito("URGENTE:");
+            texto(" Cookies UFV CASA 4 expiraram ou estão inválidos! Renove AGORA.");
+        }
+        banner.appendChild(alerta);
+    }
+
+    function aplicarEstado(estado) {
+        aplicarCookies(estado.cookies);
+        var usinas = estado.usinas;
+        Object.keys(usinas).forEach(function (nome) {
+            var usina = usinas[nome];
+            if (!cardDaUsina(nome)) {
+                window.location.reload();
+                return;
+            }
+            aplicarUsina(nome, usina.status, usina.updated_at);
+            Object.keys(usina.placas).forEach(function (codigo) {
+                aplicarPlaca(nome, codigo, usina.placas[codigo]);
+            });
+        });
+    }
+
+    function iniciar() {
+        var url = document.body.getAttribute("data-eventos-url");
+        if (!window.EventSource || !url) {
+            // navegador sem SSE: mantém o comportamento antigo
+            setTimeout(function () { window.location.reload(); }, 120000);
+            return;
+        }
+
+        var fonte = new EventSource(url);
+        fonte.addEventListener("estado", function (e) {
+            aplicarEstado(JSON.parse(e.data));
+        });
+        fonte.addEventListener("usina", function (e) {
+            var d = JSON.parse(e.data);
+            aplicarUsina(d.nome, d.status, d.updated_at);
+        });
+        fonte.addEventListener("placa", function (e) {
+            var d = JSON.parse(e.data);
+            aplicarPlaca(d.nome, d.codigo, d.status);
+        });
+        fonte.addEventListener("cookies", function (e) {
+            aplicarCookies(JSON.parse(e.data).info);
+        });
+        fonte.addEventListener("recarregar", function () {
+            window.location.reload();
+        });
+        // reconexão é automática; ao reconectar chega um "estado" completo
+    }
+
+    document.addEventListener("DOMContentLoaded", iniciar);
+})();